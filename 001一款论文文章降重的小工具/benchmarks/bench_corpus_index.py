@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""参考库索引基准：建立索引、加载索引和逐句查询的耗时
+
+用法：python benchmarks/bench_corpus_index.py [--papers 1000] [--chars 20000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus_index import INDEX_FILENAME, CorpusIndex  # noqa: E402
+
+CHARS = [chr(c) for c in range(0x4e00, 0x4e00 + 3000)]
+
+
+def make_sentence(rng):
+    return ''.join(rng.choice(CHARS) for _ in range(rng.randint(15, 40))) + '。'
+
+
+def make_paper(rng, chars):
+    parts = []
+    length = 0
+    while length < chars:
+        sentence = make_sentence(rng)
+        parts.append(sentence)
+        length += len(sentence)
+    return ''.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='参考库索引基准')
+    parser.add_argument('--papers', type=int, default=1000)
+    parser.add_argument('--chars', type=int, default=20000, help='每篇文档的字数')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    folder = tempfile.mkdtemp()
+    try:
+        papers = []
+        for i in range(args.papers):
+            paper = make_paper(rng, args.chars)
+            with open(os.path.join(folder, f'paper{i:05d}.txt'), 'w', encoding='utf-8') as f:
+                f.write(paper)
+            if i < 10:
+                papers.append(paper)
+        # 查询文本：一半摘自参考库，一半为新写的内容
+        query = ''.join(paper[1000:1600] for paper in papers[:5]) + make_paper(rng, 3000)
+
+        start = time.perf_counter()
+        index = CorpusIndex.open_folder(folder)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        CorpusIndex.open_folder(folder)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        rate = index.overlap_rate(query)
+        query_time = time.perf_counter() - start
+
+        size = os.path.getsize(os.path.join(folder, INDEX_FILENAME))
+        print(f'{args.papers} 篇 × {args.chars} 字，指纹 {len(index.keys)} 个，索引文件 {size / 1e6:.1f} MB')
+        print(f'建立索引 {build:.1f}s，加载已有索引 {load:.2f}s')
+        print(f'查询 {len(query)} 字 {query_time * 1000:.0f}ms，重复率 {rate:.1f}%（期望约 50%）')
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == '__main__':
+    main()
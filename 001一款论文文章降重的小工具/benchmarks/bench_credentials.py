@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""凭证池吞吐量基准：验证总吞吐量随凭证数量线性增长
+
+客户端每组凭证按账户版本独立限速，可用 --server-qps 让接口替身按 appid 限流，
+观察收到 54003 的凭证被降速、冷却，请求转到其他凭证。
+
+用法：python benchmarks/bench_credentials.py [--requests 20] [--server-qps 1]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from credentials import Credential, CredentialPool  # noqa: E402
+from translator import ACCOUNT_TIERS, TranslationAPI  # noqa: E402
+from stub_server import StubTranslateServer  # noqa: E402
+
+KEY_COUNTS = [1, 2, 4, 8]
+
+
+def make_keys(count):
+    return {f'2024010100000{i:04d}': chr(ord('a') + i % 26) * 20 for i in range(count)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='凭证池吞吐量基准')
+    parser.add_argument('--requests', type=int, default=20, help='每轮发送的请求数')
+    parser.add_argument('--latency', type=float, default=0.1, help='接口替身的固定延迟（秒）')
+    parser.add_argument('--tier', default='标准版', help='每组凭证的账户版本')
+    parser.add_argument('--server-qps', type=int, default=None, help='接口替身每个 appid 每秒允许的请求数')
+    args = parser.parse_args()
+
+    qps = ACCOUNT_TIERS[args.tier]
+    keys = make_keys(max(KEY_COUNTS))
+    with StubTranslateServer(latency=args.latency, credentials=keys,
+                             qps_limit=args.server_qps) as server:
+        print(f'每轮 {args.requests} 个请求，延迟 {args.latency * 1000:.0f}ms，每组凭证 {args.tier}（QPS={qps}）')
+        print(f"{'凭证数':>6} {'耗时(s)':>10} {'请求/秒':>10} {'限流':>6}")
+        for count in KEY_COUNTS:
+            # 每轮都真实发出请求，不在工作目录留下缓存、日志和额度文件
+            api = TranslationAPI(cache_path=':memory:', journal_path=None, usage_path=None)
+            api.translate_url = server.url
+            api.credentials = CredentialPool([Credential(appid, appkey, qps) for appid, appkey in
+                                              list(keys.items())[:count]], usage_path=None)
+            api.max_request_bytes = 80  # 每句一个请求
+            text = ''.join(f'第{i}句用于测试凭证池吞吐量的示例文本。' for i in range(args.requests))
+
+            server.reset_counters()
+            start = time.perf_counter()
+            ok, result = api.translate_unique_lines(api.split_lines(text), ['zh', 'en'])
+            elapsed = time.perf_counter() - start
+            assert ok and ''.join(result) == text, result
+            print(f'{count:>6} {elapsed:10.2f} {args.requests / elapsed:10.1f} '
+                  f'{server.error_counts.get("54003", 0):>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""运行统计开销基准：比较开启和关闭统计时完整语言链的耗时
+
+接口替身不加延迟，此时统计开销在总耗时中的占比最高；另测缓存全部命中、不发请求的情形。
+
+用法：python benchmarks/bench_metrics.py [--sentences 120] [--repeat 7]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import Metrics  # noqa: E402
+from translator import MODES, TranslationAPI  # noqa: E402
+from stub_server import DEFAULT_APPID, DEFAULT_APPKEY, StubTranslateServer  # noqa: E402
+from translation_cache import TranslationCache  # noqa: E402
+
+
+def make_text(sentences):
+    base = '本研究通过对比实验分析了不同参数设置对模型性能的影响，并讨论了第{}组结果的意义。'
+    return ''.join(base.format(i) for i in range(sentences))
+
+
+def make_api(server, request_bytes):
+    api = TranslationAPI(DEFAULT_APPID, DEFAULT_APPKEY, tier='尊享版', cache_path=':memory:',
+                         journal_path=None, usage_path=None)
+    api.translate_url = server.url
+    api.max_request_bytes = request_bytes
+    api.retry.set_max_rate(100000)  # 不让限速掩盖统计本身的开销
+    return api
+
+
+def timed_run(api, text, languages, metrics, warm_cache):
+    api.metrics = metrics
+    if not warm_cache:
+        api.cache = TranslationCache(':memory:')  # 每轮都真实发出请求
+    start = time.perf_counter()
+    ok, result = api.translate_chain(text, languages)
+    elapsed = time.perf_counter() - start
+    assert ok and result == text, result[:100]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='运行统计开销基准')
+    parser.add_argument('--sentences', type=int, default=120)
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--mode', default='中级')
+    parser.add_argument('--request-bytes', type=int, default=600, help='单次请求 q 参数的字节上限')
+    args = parser.parse_args()
+
+    text = make_text(args.sentences)
+    languages = MODES[args.mode]
+    with StubTranslateServer(latency=0) as server:
+        api = make_api(server, args.request_bytes)
+        print(f'{args.sentences} 句，模式 {args.mode}，每种情形重复 {args.repeat} 次取中位数')
+        print(f"{'情形':<10} {'关闭(ms)':>10} {'开启(ms)':>10} {'开销':>8}")
+        for name, warm_cache in (('无缓存', False), ('缓存全命中', True)):
+            timed_run(api, text, languages, None, warm_cache)  # 预热连接池和缓存
+            off, on = [], []
+            for _ in range(args.repeat):
+                # 交替运行，抵消机器负载的波动
+                off.append(timed_run(api, text, languages, None, warm_cache))
+                on.append(timed_run(api, text, languages, Metrics(), warm_cache))
+            off_ms = statistics.median(off) * 1000
+            on_ms = statistics.median(on) * 1000
+            print(f'{name:<10} {off_ms:10.1f} {on_ms:10.1f} {(on_ms - off_ms) / off_ms * 100:7.2f}%')
+        print(f'每次请求的统计记录约需 {record_cost() * 1e6:.1f}µs')
+
+
+def record_cost(n=100000):
+    """单独测量一次请求对应的统计调用耗时"""
+    metrics = Metrics()
+    start = time.perf_counter()
+    for _ in range(n):
+        metrics.record_request(600, 800, 0.01)
+        metrics.record_billed(200)
+        metrics.record_cache(0, 5)
+        metrics.observe_unit([('zh', 'en', 0.01)], 0.01)
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == '__main__':
+    main()
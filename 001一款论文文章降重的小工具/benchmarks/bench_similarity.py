@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""降重率计算基准测试：对比旧版纯 Python 编辑距离与位并行引擎
+
+用法：python benchmarks/bench_similarity.py [--full]
+默认情况下旧版函数在 60k 字符上按平方复杂度从 6k 的耗时估算，
+加上 --full 则实际运行（可能需要数十分钟）。
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from similarity import approximate_distance, levenshtein_distance  # noqa: E402
+
+SIZES = [1000, 6000, 60000]
+ALPHABET = '的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可也你说而过下'
+
+
+def reference_levenshtein(s1, s2):
+    """旧版实现：逐格动态规划"""
+    if len(s1) < len(s2):
+        return reference_levenshtein(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+def make_pair(size, rng):
+    """生成一段原文及其约 30% 字符被改写的版本"""
+    original = ''.join(rng.choice(ALPHABET) for _ in range(size))
+    rewritten = []
+    for c in original:
+        r = rng.random()
+        if r < 0.1:
+            continue
+        if r < 0.2:
+            rewritten.append(rng.choice(ALPHABET))
+        elif r < 0.3:
+            rewritten.append(c + rng.choice(ALPHABET))
+        else:
+            rewritten.append(c)
+    return original, ''.join(rewritten)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    full = '--full' in sys.argv
+    rng = random.Random(42)
+    print(f"{'长度':>8} {'旧版(s)':>12} {'位并行(s)':>12} {'加速比':>10} {'分块近似(s)':>12} {'近似误差':>10}")
+    reference_time = None
+    for size in SIZES:
+        s1, s2 = make_pair(size, rng)
+        fast, fast_time = timed(levenshtein_distance, s1, s2)
+        approx, approx_time = timed(approximate_distance, s1, s2)
+
+        if size <= 6000 or full:
+            expected, reference_time = timed(reference_levenshtein, s1, s2)
+            assert expected == fast, (size, expected, fast)
+            ref_text = f'{reference_time:12.3f}'
+        else:
+            # 平方复杂度估算
+            reference_time = reference_time * (size / 6000) ** 2
+            ref_text = f'{reference_time:11.1f}*'
+
+        error = (approx - fast) / fast * 100 if fast else 0.0
+        print(f'{size:>8} {ref_text} {fast_time:12.3f} {reference_time / fast_time:9.0f}x '
+              f'{approx_time:12.3f} {error:9.1f}%')
+    if not full:
+        print('* 为按平方复杂度估算的耗时，使用 --full 实际运行')
+
+
+if __name__ == '__main__':
+    main()
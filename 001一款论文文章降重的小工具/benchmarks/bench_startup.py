@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""冷启动基准：从导入 main 到主窗口首次绘制的耗时
+
+每轮在新的子进程中运行，工作目录为临时目录（不读取已有的 config.json 和缓存），
+分别记录导入、构建窗口和首次显示的耗时，并列出首次显示前已经加载、本应按需加载的模块，
+便于发现启动路径上新增的导入。运行前先编译字节码，与安装后的正常启动一致。
+无显示环境时自动使用 offscreen 平台。
+
+用法：python benchmarks/bench_startup.py [--repeat 7]
+"""
+import argparse
+import compileall
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 首次显示前不应由 main 加载的模块
+DEFERRED_MODULES = ['requests', 'difflib', 'textwrap', 'webbrowser', 'text_diff', 'document']
+PHASES = [('import_qt', '导入 PyQt5'), ('import_main', '导入 main'), ('build', '构建窗口'),
+          ('show', '首次显示'), ('total', '合计')]
+
+
+def measure():
+    """在子进程中运行：测量各阶段耗时，结果以 JSON 输出到标准输出"""
+    start = time.perf_counter()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    sys.path.insert(0, ROOT)
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    preloaded = set(sys.modules)  # 解释器启动时已由 site 等加载的模块不计入
+    qt_loaded = time.perf_counter()
+    import main
+    imported = time.perf_counter()
+    window = main.ReduceSimilarityApp()
+    built = time.perf_counter()
+    window.show()
+    app.processEvents()
+    shown = time.perf_counter()
+    print(json.dumps({
+        'import_qt': qt_loaded - start,
+        'import_main': imported - qt_loaded,
+        'build': built - imported,
+        'show': shown - built,
+        'total': shown - start,
+        'loaded': [name for name in DEFERRED_MODULES if name in sys.modules and name not in preloaded],
+    }))
+
+
+def run_once():
+    with tempfile.TemporaryDirectory() as workdir:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], cwd=workdir,
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=7, help='子进程运行次数，取中位数')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure()
+        return
+
+    compileall.compile_dir(ROOT, quiet=1)
+    runs = [run_once() for _ in range(args.repeat)]
+    print(f'冷启动 {args.repeat} 次取中位数')
+    for key, name in PHASES:
+        print(f'{name:<12} {statistics.median(run[key] for run in runs) * 1000:>8.1f} ms')
+    loaded = sorted(set().union(*(run['loaded'] for run in runs)))
+    print('首次显示前已加载的按需模块: ' + ('、'.join(loaded) if loaded else '无'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""翻译吞吐量基准：对本地接口替身运行单跳翻译和完整降重语言链
+
+运行单跳翻译、各固定模式和自动模式，报告每秒处理的句子跳数、单次 HTTP 请求的
+p50/p99 延迟、各错误码触发的重试次数以及结束时自适应调整后的请求速率。
+
+用法：python benchmarks/bench_throughput.py [--sentences 120] [--latency 0.1] [--error 52001=0.03]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translator import AUTO_MODE, MODES, TranslationAPI  # noqa: E402
+from stub_server import DEFAULT_APPID, DEFAULT_APPKEY, StubTranslateServer, parse_error_rates  # noqa: E402
+
+
+def make_text(sentences):
+    base = '本研究通过对比实验分析了不同参数设置对模型性能的影响，并讨论了第{}组结果的意义。'
+    return ''.join(base.format(i) for i in range(sentences))
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def make_api(server, tier, request_bytes):
+    # 每个场景都真实发出请求，不在工作目录留下缓存、日志和额度文件
+    api = TranslationAPI(DEFAULT_APPID, DEFAULT_APPKEY, tier=tier, cache_path=':memory:', journal_path=None,
+                         usage_path=None)
+    api.translate_url = server.url
+    api.max_request_bytes = request_bytes  # 拆成多个请求以体现并发
+
+    # 包装连接池的 post，记录每次 HTTP 请求的耗时
+    latencies = []
+    lock = threading.Lock()
+    post = api.session.post
+
+    def timed_post(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return post(*args, **kwargs)
+        finally:
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    api.session.post = timed_post
+    return api, latencies
+
+
+def run_scenario(server, name, languages, text, args):
+    api, latencies = make_api(server, args.tier, args.request_bytes)
+    server.reset_counters()
+    start = time.perf_counter()
+    if languages is None:
+        ok, result = api.translate_auto(text)
+    elif len(languages) == 2:
+        ok, result = api.translate(text, languages[0], languages[1])
+    else:
+        ok, result = api.translate_chain(text, languages)
+    elapsed = time.perf_counter() - start
+    api.session.close()
+
+    hops = api.last_auto_hops[0] if languages is None else len(languages) - 1
+    ok = ok and result == text
+    retries = ' '.join(f'{code}×{count}' for code, count in sorted(server.error_counts.items())) or '-'
+    print(f'{name:<12} {hops:>4} {elapsed:9.2f} {args.sentences * hops / elapsed:11.1f} '
+          f'{server.request_count:>7} {percentile(latencies, 0.5) * 1000:8.0f} '
+          f'{percentile(latencies, 0.99) * 1000:8.0f} {api.retry.rate:7.1f}  {"成功" if ok else "失败":<4} {retries}')
+    if not ok:
+        print(f'    {result[:120]}')
+    if languages is None:
+        print(f'    自动模式前缀树共 {hops} 跳，各链单独运行共 {api.last_auto_hops[1]} 跳')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='翻译吞吐量基准')
+    parser.add_argument('--sentences', type=int, default=120, help='测试文本的句子数，总长需在 6000 字以内')
+    parser.add_argument('--latency', type=float, default=0.1, help='接口替身的固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.05, help='额外随机延迟上限（秒）')
+    parser.add_argument('--server-qps', type=int, default=None, help='接口替身每秒允许的请求数')
+    parser.add_argument('--tier', default='高级版', help='客户端使用的账户版本')
+    parser.add_argument('--request-bytes', type=int, default=1500, help='单次请求 q 参数的字节上限')
+    parser.add_argument('--error', action='append', metavar='CODE=RATE',
+                        help='按比例注入错误码，默认 52001=0.03 和 52002=0.02')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    error_rates = parse_error_rates(args.error) if args.error else {'52001': 0.03, '52002': 0.02}
+    text = make_text(args.sentences)
+    scenarios = [('单跳翻译', ['zh', 'en'])] + [(f'降重链 {mode}', languages) for mode, languages in MODES.items()]
+    scenarios.append((f'降重链 {AUTO_MODE}', None))
+
+    with StubTranslateServer(latency=args.latency, jitter=args.jitter, error_rates=error_rates,
+                             qps_limit=args.server_qps, seed=args.seed) as server:
+        print(f'{args.sentences} 句，{len(text)} 字；延迟 {args.latency * 1000:.0f}ms'
+              f'+{args.jitter * 1000:.0f}ms，注入错误 {error_rates}，'
+              f'服务端限速 {args.server_qps or "无"}，客户端 {args.tier}')
+        print(f"{'场景':<12} {'跳数':>4} {'耗时(s)':>9} {'句跳/秒':>11} {'请求数':>7} "
+              f"{'p50(ms)':>8} {'p99(ms)':>8} {'末速率':>7}  {'结果':<4} 重试")
+        for name, languages in scenarios:
+            run_scenario(server, name, languages, text, args)
+
+
+if __name__ == '__main__':
+    main()
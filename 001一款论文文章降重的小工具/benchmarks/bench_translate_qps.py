@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""并发翻译吞吐量基准：验证吞吐量随 QPS 设置线性增长
+
+每段内容互不相同并逐句发送，缓存、去重和多行打包都不会合并请求，每段恰好对应一次请求。
+
+用法：python benchmarks/bench_translate_qps.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translator import TranslationAPI  # noqa: E402
+from stub_server import StubTranslateServer  # noqa: E402
+
+QPS_SETTINGS = [2, 5, 10, 20]
+SEGMENTS = 20
+LATENCY = 0.2
+
+
+def make_text(segments, segment_size):
+    """各段加上序号，避免相同句子被缓存或去重合并"""
+    sentence = '这是一段用于测试并发翻译吞吐量的示例文本' * (segment_size // 25 + 1)
+    return ''.join((f'第{i + 1}段' + sentence)[:segment_size - 1] + '。' for i in range(segments))
+
+
+def main():
+    with StubTranslateServer(latency=LATENCY) as server:
+        print(f'模拟延迟 {LATENCY * 1000:.0f}ms，每次翻译 {SEGMENTS} 段')
+        print(f"{'QPS':>6} {'耗时(s)':>10} {'段/秒':>10} {'请求数':>8}")
+        for qps in QPS_SETTINGS:
+            # 每轮都真实发出请求，不在工作目录留下缓存、日志和额度文件
+            api = TranslationAPI('20240101000000001', 'x' * 20, cache_path=':memory:', journal_path=None,
+                                 usage_path=None)
+            api.translate_url = server.url
+            api.segment_size = 50
+            api.pack_requests = False  # 每段单独发送，请求数不随打包而减少
+            api.retry.set_max_rate(qps)
+            text = make_text(SEGMENTS, api.segment_size)
+
+            before = server.request_count
+            start = time.perf_counter()
+            ok, result = api.translate(text, 'zh', 'en')
+            elapsed = time.perf_counter() - start
+            assert ok and result == text, result[:100]
+            sent = server.request_count - before
+            assert sent == SEGMENTS, f'应发送 {SEGMENTS} 个请求，实际 {sent} 个'
+            print(f'{qps:>6} {elapsed:10.2f} {SEGMENTS / elapsed:10.1f} {sent:>8}')
+        print(f'旧版串行实现每段至少 {LATENCY + 1:.1f}s（含固定 1 秒等待），约 {1 / (LATENCY + 1):.2f} 段/秒')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""分句器性质检验：随机生成文本，检查 iter_sentences 和 iter_segments 的输出
+
+对每个随机用例检查：
+1. 所有片段按顺序拼接后与输入完全一致；
+2. 每个片段满足 0 < 长度 <= max_length；
+3. 把输入随机切成若干块逐块传入，得到的片段与直接传入字符串相同。
+任一性质不成立时打印用例并以非零状态退出。
+
+用法：python benchmarks/fuzz_tokenizer.py [--cases 20000] [--seed 0]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokenizer import CLOSING_MARKS, SENTENCE_ENDINGS, SOFT_BREAKS, iter_segments, iter_sentences  # noqa: E402
+
+# 句末标点、引号括号、软断点、西文句点和换行出现得比普通文字更频繁，以覆盖各种状态转换
+ALPHABET = (list(SENTENCE_ENDINGS) + list(CLOSING_MARKS) + list(SOFT_BREAKS) + ['.', '.', '\n', '\n', ' ']
+            + list('研究方法结果表明abcXYZ0123'))
+
+
+def random_text(rng):
+    return ''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 200)))
+
+
+def random_chunks(text, rng):
+    """把文本在随机位置切成若干块，可能包含空块"""
+    cuts = sorted(rng.randint(0, len(text)) for _ in range(rng.randint(0, 6)))
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def check(func, text, max_length, chunks):
+    """返回不成立的性质说明，全部成立时返回 None"""
+    pieces = list(func(text, max_length))
+    if ''.join(pieces) != text:
+        return '拼接结果与输入不一致'
+    for piece in pieces:
+        if not 0 < len(piece) <= max_length:
+            return f'片段长度 {len(piece)} 超出 (0, {max_length}]'
+    if list(func(iter(chunks), max_length)) != pieces:
+        return '分块输入与字符串输入的结果不同'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--cases', type=int, default=20000, help='随机用例数')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = 0
+    for case in range(args.cases):
+        text = random_text(rng)
+        max_length = rng.randint(1, 40)
+        chunks = random_chunks(text, rng)
+        for func in (iter_sentences, iter_segments):
+            problem = check(func, text, max_length, chunks)
+            if problem:
+                failures += 1
+                if failures <= 5:
+                    print(f'用例 {case}: {func.__name__}(max_length={max_length}) {problem}\n'
+                          f'  输入 {text!r}\n  分块 {chunks!r}')
+    print(f'{args.cases} 个随机用例，iter_sentences 和 iter_segments 各检查 3 项性质，失败 {failures} 次')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
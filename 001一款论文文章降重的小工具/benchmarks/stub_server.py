@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""本地百度翻译接口替身，供基准测试和离线调试使用
+
+按 /api/trans/vip/translate 的协议校验参数和签名，收到的每一行文本默认原样返回，也可传入 transform 模拟译文。
+可模拟网络延迟、按比例注入 52001/52002/54003 错误码，并按 appid 限制每秒请求数。
+
+单独运行时在前台提供服务，把 config.json 的 endpoint 指向它即可离线使用界面：
+    python benchmarks/stub_server.py --port 8000 --latency 0.1 --qps 10 --error 52001=0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_APPID = '20240101000000001'
+DEFAULT_APPKEY = 'x' * 20
+
+ERROR_MESSAGES = {
+    '52001': 'TIMEOUT',
+    '52002': 'SYSTEM ERROR',
+    '52003': 'UNAUTHORIZED USER',
+    '54000': 'PARAM_FROM_TO_OR_Q_EMPTY',
+    '54001': 'INVALID_SIGN',
+    '54003': 'Invalid Access Limit',
+    '54004': 'Account balance is insufficient',
+    '54005': 'Long query too frequently',
+    '58002': 'Service is currently unavailable',
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持 keep-alive
+    disable_nagle_algorithm = True  # 避免响应头和响应体分两次发送时触发延迟确认
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ''
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        params.update({k: v[0] for k, v in parse_qs(body).items()})
+
+        result = self.server.stub.handle(params)
+        data = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubTranslateServer:
+    """在后台线程运行的本地翻译接口
+
+    credentials 为 {appid: 密钥}，签名按 md5(appid + q + salt + 密钥) 校验；
+    error_rates 为 {错误码: 概率}，qps_limit 为每个 appid 每秒允许的请求数，None 表示不限；
+    transform(行, 源语言, 目标语言) 返回该行的译文，默认原样返回。
+    """
+
+    def __init__(self, latency=0.05, host='127.0.0.1', port=0, jitter=0.0, error_rates=None,
+                 qps_limit=None, credentials=None, seed=None, transform=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rates = dict(error_rates or {})
+        self.qps_limit = qps_limit
+        self.credentials = credentials or {DEFAULT_APPID: DEFAULT_APPKEY}
+        self.transform = transform
+        self.request_count = 0
+        self.error_counts = Counter()
+        self._random = random.Random(seed)
+        self._recent = {}  # appid -> 最近一秒内被接受请求的时间戳
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/api/trans/vip/translate'
+
+    @property
+    def endpoint(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def record_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_count = 0
+            self.error_counts.clear()
+
+    def _error(self, code):
+        with self._lock:
+            self.error_counts[code] += 1
+        return {'error_code': code, 'error_msg': ERROR_MESSAGES.get(code, 'ERROR')}
+
+    def _over_limit(self, appid):
+        """按滑动的一秒窗口检查该 appid 是否超出每秒请求数"""
+        if not self.qps_limit:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            recent = self._recent.setdefault(appid, deque())
+            while recent and now - recent[0] >= 1.0:
+                recent.popleft()
+            if len(recent) >= self.qps_limit:
+                return True
+            recent.append(now)
+        return False
+
+    def _injected_error(self):
+        with self._lock:
+            roll = self._random.random()
+        for code, rate in self.error_rates.items():
+            if roll < rate:
+                return code
+            roll -= rate
+        return None
+
+    def handle(self, params):
+        """按接口协议处理一次请求，返回响应 JSON 对象"""
+        self.record_request()
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+        q = params.get('q', '')
+        appid = params.get('appid', '')
+        if not q or not params.get('from') or not params.get('to'):
+            return self._error('54000')
+        if appid not in self.credentials:
+            return self._error('52003')
+        sign = md5((appid + q + params.get('salt', '') + self.credentials[appid]).encode('utf-8')).hexdigest()
+        if params.get('sign') != sign:
+            return self._error('54001')
+        if self._over_limit(appid):
+            return self._error('54003')
+        code = self._injected_error()
+        if code:
+            return self._error(code)
+        from_lang, to_lang = params.get('from'), params.get('to')
+        transform = self.transform or (lambda line, from_lang, to_lang: line)
+        return {
+            'from': from_lang,
+            'to': to_lang,
+            'trans_result': [{'src': line, 'dst': transform(line, from_lang, to_lang)}
+                             for line in q.split('\n')],
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def parse_error_rates(items):
+    """把 ['52001=0.05', ...] 解析为 {错误码: 概率}"""
+    rates = {}
+    for item in items or []:
+        code, _, rate = item.partition('=')
+        rates[code.strip()] = float(rate)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地百度翻译接口替身')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.05, help='固定延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='额外随机延迟上限（秒）')
+    parser.add_argument('--qps', type=int, default=None, help='每个 appid 每秒允许的请求数')
+    parser.add_argument('--error', action='append', metavar='CODE=RATE', help='按比例注入错误码，可重复')
+    parser.add_argument('--appid', default=DEFAULT_APPID)
+    parser.add_argument('--appkey', default=DEFAULT_APPKEY)
+    args = parser.parse_args()
+
+    server = StubTranslateServer(latency=args.latency, host=args.host, port=args.port, jitter=args.jitter,
+                                 error_rates=parse_error_rates(args.error), qps_limit=args.qps,
+                                 credentials={args.appid: args.appkey})
+    print(f'接口地址: {server.url}')
+    print(f'appid: {args.appid}  密钥: {args.appkey}')
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""本地参考文献库重复率索引
+
+对参考文档做字符 k-gram 哈希，再用 winnowing 在每个窗口内取最小哈希作为指纹，
+所有 (指纹, 文档序号) 合并为一个有序的 64 位整数数组，查询时二分查找。
+两段文本只要有连续 k + window - 1 个相同的有效字符，就一定共享至少一个指纹。
+"""
+import bisect
+import json
+import os
+import unicodedata
+import zlib
+from array import array
+from collections import Counter, deque
+
+from tokenizer import iter_sentences
+
+INDEX_FILENAME = '.corpus_index'
+SUPPORTED_EXTENSIONS = ('.txt', '.docx')
+INDEX_VERSION = 1
+DEFAULT_THRESHOLD = 0.3  # 选择性改写时，重合比例达到该值的句子才送去翻译
+
+
+def normalize(text):
+    """统一全半角和大小写，只保留文字和数字，标点和空白不参与比较"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ''.join(c for c in text if c.isalnum())
+
+
+def kgram_hashes(normalized, k):
+    return [zlib.crc32(normalized[i:i + k].encode('utf-8')) for i in range(len(normalized) - k + 1)]
+
+
+def winnow(hashes, window):
+    """每个长度为 window 的窗口取最右侧的最小哈希，相邻窗口选中同一位置时只记一次"""
+    if len(hashes) <= window:
+        return [min(hashes)] if hashes else []
+    selected = []
+    last = -1
+    candidates = deque()  # 哈希值递增的位置队列，队首为当前窗口的最小值
+    for i, h in enumerate(hashes):
+        while candidates and hashes[candidates[-1]] >= h:
+            candidates.pop()
+        candidates.append(i)
+        if candidates[0] <= i - window:
+            candidates.popleft()
+        if i >= window - 1 and candidates[0] != last:
+            last = candidates[0]
+            selected.append(hashes[last])
+    return selected
+
+
+def iter_documents(folder):
+    """递归列出目录中的 .txt/.docx 文档，跳过降重结果文件"""
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            if ext.lower() in SUPPORTED_EXTENSIONS and not stem.endswith('_降重'):
+                yield os.path.join(root, name)
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+class CorpusIndex:
+    """参考文献库指纹索引，k=8、window=6 时连续 13 个相同字符必被检出"""
+
+    def __init__(self, k=8, window=6):
+        self.k = k
+        self.window = window
+        self.documents = []  # 每个文档的 {'path', 'size', 'mtime'}
+        self.keys = array('Q')  # (指纹 << 32) | 文档序号，升序
+
+    def fingerprints(self, text):
+        return winnow(kgram_hashes(normalize(text), self.k), self.window)
+
+    @classmethod
+    def build(cls, paths, k=8, window=6, progress_callback=None, cancel_event=None):
+        """为一组文档建立索引，progress_callback(已处理文档数, 文档总数)；被取消时返回 None"""
+        from document import DocumentSource  # 延迟导入，只查询已有索引或读取默认阈值时不必加载 .docx 解析
+        index = cls(k, window)
+        paths = list(paths)
+        keys = array('Q')
+        for doc_id, path in enumerate(paths):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            text = ''.join(DocumentSource(path).iter_chunks())
+            # 同一文档内重复的指纹只记一次
+            for fingerprint in set(index.fingerprints(text)):
+                keys.append(fingerprint << 32 | doc_id)
+            index.documents.append(_signature(path))
+            if progress_callback:
+                progress_callback(doc_id + 1, len(paths))
+        index.keys = array('Q', sorted(keys))
+        return index
+
+    @classmethod
+    def open_folder(cls, folder, progress_callback=None, cancel_event=None):
+        """打开参考文献目录，目录下保存的索引与文档一致时直接加载，否则重新建立并保存"""
+        paths = list(iter_documents(folder))
+        index_path = os.path.join(folder, INDEX_FILENAME)
+        if os.path.exists(index_path):
+            try:
+                index = cls.load(index_path)
+                if index.documents == [_signature(path) for path in paths]:
+                    return index
+            except (OSError, ValueError, KeyError):
+                pass  # 索引文件损坏或版本不符时重新建立
+        index = cls.build(paths, progress_callback=progress_callback, cancel_event=cancel_event)
+        if index is not None:
+            try:
+                index.save(index_path)
+            except OSError:
+                pass  # 目录只读时只在内存中使用
+        return index
+
+    def save(self, path):
+        header = {'version': INDEX_VERSION, 'k': self.k, 'window': self.window,
+                  'documents': self.documents, 'count': len(self.keys)}
+        with open(path, 'wb') as f:
+            f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.keys.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline().decode('utf-8'))
+            if header.get('version') != INDEX_VERSION:
+                raise ValueError('索引版本不符')
+            index = cls(header['k'], header['window'])
+            index.documents = header['documents']
+            index.keys.fromfile(f, header['count'])
+        return index
+
+    def _lookup(self, fingerprint):
+        """返回包含该指纹的文档序号"""
+        lo = bisect.bisect_left(self.keys, fingerprint << 32)
+        hi = bisect.bisect_left(self.keys, (fingerprint + 1) << 32, lo)
+        return [self.keys[i] & 0xFFFFFFFF for i in range(lo, hi)]
+
+    def score_sentence(self, sentence):
+        """返回 (与参考库重合的指纹比例, 重合最多的文档路径或 None)"""
+        hashes = kgram_hashes(normalize(sentence), self.k)
+        # 短句不足一个窗口时文档一侧未必选中同一个最小值，改为查询全部 k-gram
+        fingerprints = set(winnow(hashes, self.window) if len(hashes) > self.window else hashes)
+        if not fingerprints:
+            return 0.0, None
+        matched = 0
+        hits = Counter()
+        for fingerprint in fingerprints:
+            docs = self._lookup(fingerprint)
+            if docs:
+                matched += 1
+                hits.update(set(docs))
+        source = self.documents[hits.most_common(1)[0][0]]['path'] if hits else None
+        return matched / len(fingerprints), source
+
+    def keep_original(self, threshold=DEFAULT_THRESHOLD):
+        """返回供 translate_chain 使用的 keep_line：与参考库重合比例低于 threshold 的句子原样保留"""
+        return lambda sentence: self.score_sentence(sentence)[0] < threshold
+
+    def score_text(self, text):
+        """逐句评分，返回 [(句子, 重合比例, 来源文档), ...]"""
+        return [(sentence,) + self.score_sentence(sentence)
+                for sentence in iter_sentences(text) if sentence.strip()]
+
+    def overlap_rate(self, text):
+        """按有效字符数加权的整体重复率（百分比）"""
+        total = 0
+        overlap = 0.0
+        for sentence, score, _ in self.score_text(text):
+            length = len(normalize(sentence))
+            total += length
+            overlap += score * length
+        return overlap / total * 100 if total else 0.0
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""多组API凭证的负载均衡与额度统计
+
+每组凭证有独立的令牌桶和重试调度器，请求总是发给最早能取得令牌的可用凭证，
+因此总吞吐量随凭证数量增加。每组凭证本月已用的字符数保存在 credential_usage.json，
+达到 monthly_quota 或收到余额不足等错误的凭证自动跳过，收到限流响应的凭证短暂冷却。
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from rate_limiter import TokenBucket
+from retry import RetryScheduler
+
+DEFAULT_USAGE_FILE = 'credential_usage.json'
+# 52003 未授权用户、54004 账户余额不足、58002 服务已关闭：换用其他凭证，本凭证不再使用
+DISABLING_CODES = {'52003', '54004', '58002'}
+THROTTLE_COOLDOWN = 1.0  # 收到限流响应后该凭证暂停的秒数
+
+_usage_file_lock = threading.Lock()  # 本进程内所有凭证池共用，串行化额度文件的读取、合并和写入
+
+
+def current_month():
+    return time.strftime('%Y-%m')
+
+
+class Credential:
+    """一组 APPID/APPKEY 及其速率和额度状态"""
+
+    def __init__(self, appid, appkey, qps=1, monthly_quota=None):
+        self.appid = appid or ''
+        self.appkey = appkey or ''
+        self.monthly_quota = monthly_quota  # 每月字符额度，None 表示不限
+        self.used = 0  # 本月已计费的字符数（含正在发送的请求）
+        self.disabled = None  # 停用原因
+        self.cooldown_until = 0.0
+        self.rate_limiter = TokenBucket(qps)
+        self.retry = RetryScheduler(self.rate_limiter, qps)
+
+    @property
+    def qps(self):
+        return self.retry.max_rate
+
+    def remaining(self):
+        """本月剩余字符额度，不限额度时返回 None"""
+        if self.monthly_quota is None:
+            return None
+        return max(0, self.monthly_quota - self.used)
+
+    def can_send(self, chars):
+        return not self.disabled and (self.monthly_quota is None or self.used + chars <= self.monthly_quota)
+
+
+class CredentialPool:
+    """在多组凭证之间分配请求
+
+    acquire(字符数) 选出等待时间最短的可用凭证、预占字符额度并取得令牌；
+    请求成功后调用 commit，失败则调用 release 归还预占的额度。
+    """
+
+    def __init__(self, credentials, usage_path=DEFAULT_USAGE_FILE):
+        self.credentials = list(credentials)
+        self.usage_path = usage_path
+        self.month = current_month()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self.load_usage()
+
+    def __len__(self):
+        return len(self.credentials)
+
+    @property
+    def primary(self):
+        return self.credentials[0]
+
+    @property
+    def qps(self):
+        """所有未停用凭证的 QPS 上限之和"""
+        return sum(c.qps for c in self.credentials if not c.disabled)
+
+    def retry_counts(self):
+        total = Counter()
+        for credential in self.credentials:
+            total.update(credential.retry.retry_counts)
+        return total
+
+    def load_usage(self):
+        """读取本月各凭证已用的字符数，跨月后从零开始"""
+        if not self.usage_path or not os.path.exists(self.usage_path):
+            return
+        try:
+            with open(self.usage_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('month') != self.month:
+            return
+        used = data.get('used', {})
+        for credential in self.credentials:
+            credential.used = int(used.get(credential.appid, 0))
+
+    def save_usage(self, force=True):
+        """保存各凭证本月已用的字符数；force 为 False 时一秒内最多写一次
+
+        读取、合并和写入都在 _usage_file_lock 内完成，多个线程（CLI 的 --jobs、自动模式的各分支）
+        同时保存时不会读到写了一半的文件。新内容先写入同目录下的临时文件再替换原文件，
+        写入中途退出时原文件保持完整，额度计数不会因文件损坏而归零。
+        """
+        if not self.usage_path:
+            return
+        with _usage_file_lock:
+            with self._lock:
+                now = time.monotonic()
+                if not self._dirty or (not force and now - self._last_save < 1.0):
+                    return
+                self._dirty = False
+                self._last_save = now
+                data = {'month': self.month, 'used': {c.appid: c.used for c in self.credentials}}
+            try:
+                if os.path.exists(self.usage_path):
+                    with open(self.usage_path, 'r', encoding='utf-8') as f:
+                        previous = json.load(f)
+                    if previous.get('month') == self.month:
+                        # 保留不在当前凭证池中的其他 APPID 的记录
+                        data['used'] = dict(previous.get('used', {}), **data['used'])
+            except (OSError, ValueError):
+                pass
+            folder = os.path.dirname(os.path.abspath(self.usage_path))
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix='.credential_usage-', suffix='.tmp', dir=folder)
+            except OSError:
+                return
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=4)
+                os.replace(temp_path, self.usage_path)
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _rollover(self):
+        """进入新的月份时清零各凭证的计数"""
+        month = current_month()
+        if month != self.month:
+            self.month = month
+            for credential in self.credentials:
+                credential.used = 0
+            self._dirty = True
+
+    def _select(self, chars):
+        """返回 (需要等待最短的可用凭证, 等待秒数)，没有可用凭证时返回 (None, 0)"""
+        now = time.monotonic()
+        best = None
+        best_delay = 0.0
+        for credential in self.credentials:
+            if not credential.can_send(chars):
+                continue
+            delay = max(credential.cooldown_until - now, credential.rate_limiter.delay())
+            if best is None or delay < best_delay:
+                best, best_delay = credential, delay
+        return best, best_delay
+
+    def acquire(self, chars, cancel_event=None):
+        """为一次 chars 个字符的请求选择凭证并取得令牌，所有凭证都不可用时返回 None
+
+        被 cancel_event 打断时仍返回选中的凭证，由调用方检查取消状态并 release。
+        """
+        with self._lock:
+            self._rollover()
+            credential, _ = self._select(chars)
+            if credential is None:
+                return None
+            credential.used += chars
+        cooldown = credential.cooldown_until - time.monotonic()
+        if cooldown > 0:
+            # 所有可用凭证都在冷却，等最先结束的一个
+            if cancel_event is not None:
+                if cancel_event.wait(cooldown):
+                    return credential
+            else:
+                time.sleep(cooldown)
+        credential.rate_limiter.acquire(cancel_event)
+        return credential
+
+    def commit(self, credential):
+        """请求成功，预占的额度计为已用"""
+        with self._lock:
+            self._dirty = True
+        credential.retry.on_success()
+        self.save_usage(force=False)
+
+    def release(self, credential, chars):
+        """请求未成功，归还预占的额度"""
+        with self._lock:
+            credential.used = max(0, credential.used - chars)
+
+    def throttle(self, credential):
+        """收到限流响应：降低该凭证的速率并短暂冷却，期间请求优先发给其他凭证
+
+        返回是否有其他不在冷却中的可用凭证。
+        """
+        credential.retry.on_throttle()
+        now = time.monotonic()
+        credential.cooldown_until = now + THROTTLE_COOLDOWN
+        return any(c is not credential and not c.disabled and c.cooldown_until <= now
+                   for c in self.credentials)
+
+    def disable(self, credential, reason):
+        """停用凭证并返回 True；没有其他可用凭证时保持启用，返回 False，以便充值后直接重试"""
+        with self._lock:
+            if not any(c is not credential and not c.disabled for c in self.credentials):
+                return False
+            credential.disabled = reason
+            return True
+
+    def total_used(self):
+        return sum(c.used for c in self.credentials)
+
+    def summary(self):
+        """各凭证的状态，供界面和报告显示"""
+        return [{'appid': c.appid, 'qps': c.qps, 'rate': round(c.retry.rate, 2), 'used': c.used,
+                 'monthly_quota': c.monthly_quota, 'disabled': c.disabled}
+                for c in self.credentials]
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""长文档流式降重
+
+逐块读取 .txt/.docx，按分段窗口送入语言链，每完成一个分段就追加写出结果并记录检查点。
+中途崩溃或额度用尽后再次运行会从最后一个检查点继续，内存占用与文档长度无关。
+"""
+import codecs
+import json
+import os
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+from tokenizer import iter_segments
+
+READ_SIZE = 64 * 1024
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class _CountingReader:
+    """记录已读取字节数的包装流，用于估算进度"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def _detect_encoding(path):
+    """根据文件开头判断编码，不是 UTF-8 时按 GB18030 读取"""
+    with open(path, 'rb') as f:
+        sample = f.read(READ_SIZE)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+
+def _iter_txt(reader, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    while True:
+        data = reader.read(READ_SIZE)
+        if not data:
+            break
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        yield tail
+
+
+def _iter_docx(reader):
+    """逐段解析 word/document.xml，每个段落以换行结尾"""
+    parts = []
+    for event, elem in iterparse(reader, events=('end',)):
+        tag = elem.tag
+        if tag == WORD_NS + 't':
+            parts.append(elem.text or '')
+        elif tag == WORD_NS + 'tab':
+            parts.append('\t')
+        elif tag == WORD_NS + 'p':
+            yield ''.join(parts) + '\n'
+            parts = []
+            elem.clear()  # 释放已处理的段落，保持内存占用平稳
+
+
+class DocumentSource:
+    """以文本块流的形式读取 .txt 或 .docx 文档"""
+
+    def __init__(self, path):
+        self.path = path
+        self.is_docx = path.lower().endswith('.docx')
+        if self.is_docx:
+            with zipfile.ZipFile(path) as archive:
+                self.total_bytes = archive.getinfo('word/document.xml').file_size
+        else:
+            self.total_bytes = os.path.getsize(path)
+        self.reader = None
+
+    @property
+    def bytes_read(self):
+        return self.reader.bytes_read if self.reader else 0
+
+    def iter_chunks(self):
+        if self.is_docx:
+            with zipfile.ZipFile(self.path) as archive, archive.open('word/document.xml') as raw:
+                self.reader = _CountingReader(raw)
+                yield from _iter_docx(self.reader)
+        else:
+            encoding = _detect_encoding(self.path)
+            with open(self.path, 'rb') as raw:
+                self.reader = _CountingReader(raw)
+                yield from _iter_txt(self.reader, encoding)
+
+
+class DocumentReducer:
+    """长文档降重，检查点日志记录已写出的分段序号和输出文件偏移量"""
+
+    def __init__(self, translation_api, languages, input_path, output_path, checkpoint_path=None,
+                 keep_line=None, preprocess=None):
+        self.translation_api = translation_api
+        self.languages = languages
+        self.keep_line = keep_line  # 返回 True 的句子原样保留，见 TranslationAPI.translate_chain
+        self.preprocess = preprocess  # 翻译前对每个分段做的处理，例如同义词替换
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or output_path + '.checkpoint'
+        self.window_size = translation_api.max_workers * 2  # 每批并发处理的分段数
+
+    def _header(self):
+        stat = os.stat(self.input_path)
+        return {
+            'input': os.path.abspath(self.input_path),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'languages': self.languages,
+        }
+
+    def _load_checkpoint(self):
+        """读取检查点，返回 (已完成的分段数, 输出文件偏移量)，不可续传时返回 None"""
+        if not os.path.exists(self.checkpoint_path) or not os.path.exists(self.output_path):
+            return None
+        last = None
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return None
+            if header != self._header():
+                return None
+            for line in f:
+                try:
+                    last = json.loads(line)
+                except ValueError:
+                    break  # 崩溃时写了一半的记录
+        if last is None:
+            return 0, 0
+        return last['segment'] + 1, last['offset']
+
+    def run(self, progress_callback=None, cancel_event=None):
+        """执行降重，返回 (是否成功, 提示信息)
+
+        progress_callback(已完成分段数, 已读取字节数, 总字节数)
+        """
+        source = DocumentSource(self.input_path)
+        resume = self._load_checkpoint()
+        if resume is None:
+            done, offset = 0, 0
+            with open(self.checkpoint_path, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(self._header(), ensure_ascii=False) + '\n')
+            open(self.output_path, 'wb').close()
+        else:
+            done, offset = resume
+
+        with open(self.output_path, 'r+b') as out, \
+                open(self.checkpoint_path, 'a', encoding='utf-8') as journal:
+            out.truncate(offset)
+            out.seek(offset)
+
+            def commit(index, translated):
+                out.write(translated.encode('utf-8'))
+                out.flush()
+                os.fsync(out.fileno())
+                journal.write(json.dumps({'segment': index, 'offset': out.tell()}) + '\n')
+                journal.flush()
+
+            index = 0
+            window = []
+            segments = iter_segments(source.iter_chunks(), self.translation_api.segment_size)
+            for segment in segments:
+                if index < done:
+                    index += 1  # 跳过检查点之前已完成的分段
+                    continue
+                window.append(self.preprocess(segment) if self.preprocess else segment)
+                index += 1
+                if len(window) >= self.window_size:
+                    ok, message = self._translate_window(window, index - len(window), commit,
+                                                         cancel_event)
+                    if not ok:
+                        return False, message
+                    window = []
+                    if progress_callback:
+                        progress_callback(index, source.bytes_read, source.total_bytes)
+            if window:
+                ok, message = self._translate_window(window, index - len(window), commit, cancel_event)
+                if not ok:
+                    return False, message
+            if progress_callback:
+                progress_callback(index, source.total_bytes, source.total_bytes)
+
+        os.remove(self.checkpoint_path)
+        return True, f"文档降重完成，共 {index} 个分段"
+
+    def _translate_window(self, window, start, commit, cancel_event):
+        """并发翻译一批分段，按顺序写出已完成的连续分段"""
+        finished = {}
+        next_index = [0]
+
+        def on_segment(i, translated):
+            finished[i] = translated
+            while next_index[0] in finished:
+                commit(start + next_index[0], finished.pop(next_index[0]))
+                next_index[0] += 1
+
+        ok, result = self.translation_api.translate_segments(
+            window, self.languages, segment_callback=on_segment, cancel_event=cancel_event,
+            keep_line=self.keep_line)
+        if not ok:
+            return False, f"{result}（已保存检查点，重新运行可从第 {start + next_index[0] + 1} 个分段继续）"
+        return True, ''
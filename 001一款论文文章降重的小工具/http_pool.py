@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""带连接池的 HTTP 会话"""
+import threading
+
+
+class PooledSession:
+    """复用 keep-alive 连接的会话，所有语言跳共享同一个连接池
+
+    第一次发送请求时才导入 requests 并建立连接池，图形界面启动和不发请求的脚本无需承担加载开销。
+    """
+
+    def __init__(self, pool_size=8, connect_timeout=5, read_timeout=20):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.session = None
+        self.adapter = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """建立 requests 会话，多个线程同时发出第一个请求时只建立一次"""
+        with self._lock:
+            if self.session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.adapter = adapter
+                self.session = session
+        return self.session
+
+    def post(self, url, **kwargs):
+        """发送 POST 请求，默认使用分开的连接超时和读取超时"""
+        kwargs.setdefault('timeout', (self.connect_timeout, self.read_timeout))
+        session = self.session or self._connect()
+        return session.post(url, **kwargs)
+
+    def stats(self):
+        """连接复用统计：请求数、新建连接数、复用连接的请求数"""
+        if self.adapter is None:
+            return {'requests': 0, 'connections': 0, 'reused': 0}
+        requests_count = 0
+        connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_count += pool.num_requests
+            connections += pool.num_connections
+        return {
+            'requests': requests_count,
+            'connections': connections,
+            'reused': max(0, requests_count - connections),
+        }
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""基于 SQLite 的降重任务日志
+
+按 (任务哈希, 单元序号, 跳序号) 记录每个单元走完每一跳后的中间译文。
+语言链中途失败后重新运行同一任务时，各单元从已记录的最后一跳继续，只为缺失的单元×跳发送请求。
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL_FILE = 'job_journal.db'
+
+
+class JobJournal:
+    """每个单元只保留最后完成的一跳，超过 max_age 秒的记录在打开时清除"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE, max_age=7 * 24 * 3600):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+        except sqlite3.Error:
+            # 无法写入磁盘时退化为内存日志
+            self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cells (
+                job TEXT NOT NULL,
+                unit INTEGER NOT NULL,
+                hop INTEGER NOT NULL,
+                lines TEXT NOT NULL,
+                created REAL NOT NULL,
+                PRIMARY KEY (job, unit, hop)
+            )''')
+        self._conn.execute('DELETE FROM cells WHERE created < ?', (time.time() - max_age,))
+        self._conn.commit()
+
+    @staticmethod
+    def job_key(units, languages):
+        """任务哈希：由各单元的原文和语言链共同决定"""
+        payload = json.dumps([languages, units], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def record(self, job, unit, hop, lines):
+        """记录单元 unit 完成第 hop 跳（从 1 开始）后的译文行，并删除该单元更早的记录"""
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)',
+                               (job, unit, hop, json.dumps(lines, ensure_ascii=False), time.time()))
+            self._conn.execute('DELETE FROM cells WHERE job = ? AND unit = ? AND hop < ?', (job, unit, hop))
+            self._conn.commit()
+
+    def resume(self, job, unit):
+        """返回 (已完成的跳数, 译文行列表)，没有记录时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT hop, lines FROM cells WHERE job = ? AND unit = ? ORDER BY hop DESC LIMIT 1',
+                (job, unit)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def discard(self, job):
+        """删除任务的全部记录"""
+        with self._lock:
+            self._conn.execute('DELETE FROM cells WHERE job = ?', (job,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM cells')
+            self._conn.commit()
@@ -1,387 +1,76 @@
 # -*- coding: utf-8 -*-
-import difflib
-import json
+"""文章降重助手图形界面
+
+启动时只导入构建主编辑区所需的模块，requests、差异计算和文档读取在第一次用到时才导入，
+对比页和统计页在第一次切换到或用到时才构建，冷启动耗时见 benchmarks/bench_startup.py。
+"""
 import os
-import random
 import sys
-import textwrap
-import time
-import webbrowser
-from hashlib import md5
-
-import requests
-from PyQt5.QtCore import Qt, QSettings
-from PyQt5.QtGui import QTextBlockFormat, QTextCharFormat, QColor, QTextCursor
+import threading
+
+from PyQt5.QtCore import Qt, QSettings, QThread, QTime, QTimer, pyqtSignal
+from PyQt5.QtGui import QTextBlockFormat, QTextCursor
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QHBoxLayout,
                              QTextEdit, QComboBox, QPushButton, QLabel, QProgressBar, QMessageBox,
-                             QDialog, QVBoxLayout, QLineEdit, QFrame,
-                             QTabWidget)
-
-
-def levenshtein_distance(s1, s2):
-    """计算两个字符串的编辑距离"""
-    if len(s1) < len(s2):
-        return levenshtein_distance(s2, s1)
-    if len(s2) == 0:
-        return len(s1)
-    previous_row = range(len(s2) + 1)
-    for i, c1 in enumerate(s1):
-        current_row = [i + 1]
-        for j, c2 in enumerate(s2):
-            insertions = previous_row[j + 1] + 1
-            deletions = current_row[j] + 1
-            substitutions = previous_row[j] + (c1 != c2)
-            current_row.append(min(insertions, deletions, substitutions))
-        previous_row = current_row
-    return previous_row[-1]
-
-
-class APIConfigDialog(QDialog):
-    """API配置弹窗"""
-
-    def __init__(self, parent=None, settings=None):
-        super().__init__(parent)
-        self.settings = settings
-        self.initUI()
-
-    def initUI(self):
-        self.setWindowTitle('API配置')
-        self.setGeometry(200, 200, 500, 300)
-
-        layout = QVBoxLayout()
-
-        # API配置说明
-        info_label = QLabel('请配置百度翻译API信息：')
-        layout.addWidget(info_label)
-
-        # APPID输入
-        appid_layout = QHBoxLayout()
-        appid_label = QLabel('APPID:')
-        self.appid_input = QLineEdit()
-        self.appid_input.setText(self.settings.value('api/appid', ''))
-        appid_layout.addWidget(appid_label)
-        appid_layout.addWidget(self.appid_input)
-        layout.addLayout(appid_layout)
-
-        # APPKEY输入
-        appkey_layout = QHBoxLayout()
-        appkey_label = QLabel('APPKEY:')
-        self.appkey_input = QLineEdit()
-        self.appkey_input.setText(self.settings.value('api/appkey', ''))
-        appkey_layout.addWidget(appkey_label)
-        appkey_layout.addWidget(self.appkey_input)
-        layout.addLayout(appkey_layout)
-
-        # 按钮布局
-        button_layout = QHBoxLayout()
-
-        # 注册链接按钮
-        register_button = QPushButton('注册账号')
-        register_button.clicked.connect(lambda: webbrowser.open('https://fanyi-api.baidu.com/'))
-
-        # 测试连接按钮
-        test_button = QPushButton('测试连接')
-        test_button.clicked.connect(self.test_connection)
-
-        # 保存按钮
-        save_button = QPushButton('保存配置')
-        save_button.clicked.connect(self.save_config)
-
-        button_layout.addWidget(register_button)
-        button_layout.addWidget(test_button)
-        button_layout.addWidget(save_button)
-        layout.addLayout(button_layout)
-
-        # 分割线
-        line = QFrame()
-        line.setFrameShape(QFrame.HLine)
-        line.setFrameShadow(QFrame.Sunken)
-        layout.addWidget(line)
-
-        # 版本说明
-        version_info = QLabel("""版本说明：
-        标准版：每月免费5万字符
-        高级版：(实名认证后)每月100万字符
-        """)
-        version_info.setStyleSheet("color: gray;")
-        layout.addWidget(version_info)
-
-        # 当前使用量
-        self.usage_label = QLabel('本月已使用：0 字符')
-        layout.addWidget(self.usage_label)
-
-        self.setLayout(layout)
-
-    def test_connection(self):
-        """测试API连接"""
-        appid = self.appid_input.text().strip()
-        appkey = self.appkey_input.text().strip()
-
-        if not appid or not appkey:
-            QMessageBox.warning(self, "警告", "请输入APPID和APPKEY")
-            return
-
-        # 创建临时翻译器测试连接
-        translator = TranslationAPI(appid, appkey)
-        result = translator.translate("测试", "zh", "en")
-
-        if '错误' not in result and '失败' not in result:
-            QMessageBox.information(self, "成功", "API连接测试成功！")
-        else:
-            QMessageBox.warning(self, "失败", f"API连接测试失败：{result}")
-
-    def save_config(self):
-        """保存API配置"""
-        appid = self.appid_input.text().strip()
-        appkey = self.appkey_input.text().strip()
-
-        if not appid or not appkey:
-            QMessageBox.warning(self, "警告", "请输入APPID和APPKEY")
-            return
-
-        self.settings.setValue('api/appid', appid)
-        self.settings.setValue('api/appkey', appkey)
-        QMessageBox.information(self, "成功", "配置保存成功！")
-        self.accept()
-
-
-class LogDialog(QDialog):
-    """日志窗口"""
-
-    def __init__(self, parent=None):
+                             QVBoxLayout, QLineEdit, QFrame,
+                             QTabWidget, QFileDialog, QCheckBox, QSpinBox)
+
+from corpus_index import DEFAULT_THRESHOLD, CorpusIndex
+from similarity import similarity_rate
+from masking import protected_spans
+from metrics import format_summary
+from synonyms import OFFLINE_MODE, default_engine
+from text_stats import TextStats
+from translator import ACCOUNT_TIERS, AUTO_MODE, MODES, TranslationAPI, mode_hops
+
+REGISTER_URL = 'https://fanyi-api.baidu.com/'
+INSTRUCTIONS = """\
+使用步骤：
+1. 配置API：
+   - 点击"注册账号"前往百度翻译开放平台注册
+   - 将获取的APPID和APPKEY填入上方对应输入框
+   - 点击"测试连接"确保API可用
+   - 点击"保存配置"保存API信息
+
+2. 降重操作：
+   - 在右侧"原文输入"框中输入或粘贴文章
+   - 选择降重模式（字符限制：标准版5万字符/月）
+   - 点击"开始降重"，等待处理完成
+   - 降重完成后可查看降重率
+   - 使用"一键复制"获取降重结果
+
+降重模式说明：
+- 初级：中 -> 英 -> 德 -> 中
+- 中级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 中
+- 高级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 意大利 -> 波兰 -> 保加利亚 -> 爱沙尼亚 -> 中
+
+注意事项：
+1. 首次使用需要配置API信息
+2. 请注意API使用量限制
+3. 建议先使用初级模式测试效果
+4. 高级模式翻译路径更长，耗时更多
+5. 降重率越高表示文章改动越大"""
+
+
+class LazyTab(QWidget):
+    """选项卡占位页，第一次显示或调用 widget() 时才由 factory 构建实际内容"""
+
+    def __init__(self, factory, parent=None):
         super().__init__(parent)
-        self.initUI()
-
-    def initUI(self):
-        self.setWindowTitle('翻译日志')
-        self.setGeometry(200, 200, 500, 300)
-
-        layout = QVBoxLayout()
-
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        layout.addWidget(self.log_text)
-
-        self.setLayout(layout)
-
-    def append_log(self, log):
-        """添加日志"""
-        self.log_text.append(log)
-        self.log_text.update()
-        self.log_text.repaint()
-        QApplication.processEvents()
-
-
-class ConfigManager:
-    """配置管理器"""
-
-    def __init__(self):
-        self.config_file = 'config.json'
-        self.config = self.load_config()
-
-    def load_config(self):
-        """加载配置"""
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {'appid': '', 'appkey': ''}
-        return {'appid': '', 'appkey': ''}
-
-    def save_config(self, appid, appkey):
-        """保存配置"""
-        self.config = {
-            'appid': appid,
-            'appkey': appkey
-        }
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, ensure_ascii=False, indent=4)
-            return True
-        except:
-            return False
-
-    def get_config(self):
-        """获取配置"""
-        return self.config
-
-
-class TranslationAPI:
-    def __init__(self, appid=None, appkey=None):
-        self.appid = appid
-        self.appkey = appkey
-        self.endpoint = 'http://api.fanyi.baidu.com'
-        self.translate_path = '/api/trans/vip/translate'
-        self.translate_url = self.endpoint + self.translate_path
-        self.headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        self.max_text_length = 6000  # 最大文本长度限制
-        self.segment_size = 2000  # 分段大小
-        self.config_manager = ConfigManager()
-        self.is_authenticated = False
-
-    def validate_credentials(self):
-        """验证API凭证的有效性"""
-        if not self.appid or not self.appkey:
-            return False, "API凭证未配置"
-            
-        if not self.appid.isdigit():
-            return False, "APPID格式不正确"
-            
-        if len(self.appkey) < 20:
-            return False, "APPKEY格式不正确"
-            
-        return True, "验证通过"
-
-    def make_md5(self, s, encoding='utf-8'):
-        return md5(s.encode(encoding)).hexdigest()
-
-    def check_text_length(self, text):
-        """检查文本长度是否超过限制"""
-        if len(text) > self.max_text_length:
-            return False, f"文本长度超过限制（{len(text)}/{self.max_text_length}），请删除 {len(text) - self.max_text_length} 个字符"
-        return True, ""
-
-    def split_text(self, text):
-        """将文本分割为适当大小的段落"""
-        # 按句号分割文本
-        sentences = text.split('。')
-        segments = []
-        current_segment = ''
-
-        for sentence in sentences:
-            # 如果句子不是空的，加上句号
-            if sentence:
-                sentence = sentence + '。'
-
-            # 如果当前段落加上新句子超过限制
-            if len(current_segment) + len(sentence) > self.segment_size:
-                if current_segment:
-                    segments.append(current_segment)
-                current_segment = sentence
-            else:
-                current_segment += sentence
-
-        # 添加最后一个段落
-        if current_segment:
-            segments.append(current_segment)
-
-        return segments
-
-    def translate(self, text, from_lang, to_lang, retries=3, log_callback=None):
-        if not text:
-            return "错误: 输入文本为空"
-
-        # 在每次翻译前验证API凭证
-        is_valid, msg = self.validate_credentials()
-        if not is_valid:
-            return f"错误: {msg}"
-
-        # 检查总文本长度
-        is_valid, error_msg = self.check_text_length(text)
-        if not is_valid:
-            return error_msg
-
-        # 分段处理
-        segments = self.split_text(text)
-        translated_segments = []
-
-        for segment in segments:
-            for attempt in range(retries):
-                salt = random.randint(32768, 65536)
-                sign = self.make_md5(self.appid + segment + str(salt) + self.appkey)
-
-                payload = {
-                    'appid': self.appid,
-                    'q': segment,
-                    'from': from_lang,
-                    'to': to_lang,
-                    'salt': salt,
-                    'sign': sign,
-                    'random': str(random.random())
-                }
-
-                try:
-                    response = requests.post(self.translate_url, params=payload, headers=self.headers, timeout=20)
-                    response.raise_for_status()
-                    result = response.json()
-                    
-                    # 检查API返回的错误码
-                    if 'error_code' in result:
-                        error_msg = f"API错误: {result.get('error_code')} - {result.get('error_msg', '未知错误')}"
-                        if result.get('error_code') in ['52001', '52002']:  # 超时错误，可以重试
-                            if attempt == retries - 1:
-                                return error_msg
-                            time.sleep(1)
-                            continue
-                        return error_msg  # 其他错误直接返回
-                        
-                    if 'trans_result' in result:
-                        translated_segments.append(result['trans_result'][0]['dst'])
-                        break
-                    else:
-                        error = f"翻译错误: {result.get('error_code', '未知错误')} - {result.get('error_msg', '无错误信息')}"
-                        if attempt == retries - 1:
-                            return error
-                except requests.exceptions.RequestException as e:
-                    error = f"请求失败: {str(e)}"
-                    if attempt == retries - 1:
-                        return error
-                time.sleep(1)  # 重试前延迟
-            time.sleep(1)  # 每段翻译后延迟
-
-        return ''.join(translated_segments)
-
-    def set_api_info(self, appid, appkey):
-        """设置API信息并保存"""
-        # 验证新的API凭证
-        self.appid = appid
-        self.appkey = appkey
-        is_valid, msg = self.validate_credentials()
-        if not is_valid:
-            return False
-            
-        # 保存到配置文件
-        return self.config_manager.save_config(appid, appkey)
-
-
-class InstructionDialog(QDialog):
-    """使用说明弹窗"""
-
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.initUI()
-
-    def initUI(self):
-        self.setWindowTitle('使用说明')
-        self.setGeometry(200, 200, 600, 400)
-
-        layout = QVBoxLayout()
-
-        info_text = QTextEdit()
-        info_text.setReadOnly(True)
-        info_content = textwrap.dedent("""
-            使用说明：
-            1. 在"原文输入"框中输入需要降重的文章内容。
-            2. 在"降重模式"下拉框中选择模式（初级、中级、高级）。
-            3. 点击"开始降重"按钮，等待处理完成。
-            4. 查看"降重结果"框中的输出和"降重率"显示。
-            5. 不支持分段降重，如有2段及以上请删除段落符号再进行操作。
-
-            软件原理：
-            利用百度翻译通用API在不同语言间转换，由于不同语言语序不同，转换后可有效降重。
-            - 初级：中 -> 英 -> 德 -> 中
-            - 中级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 中
-            - 高级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 意大利 -> 波兰 -> 保加利亚 -> 爱沙尼亚 -> 中
+        self.factory = factory
+        self.content = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
 
-            示例：
-            原文：随着信息技术的不断发展与进步，人们在21世纪已经进入互联网的时代...
-            降重后：随着信息技术的持续发展和进步，21世纪的人们已进入互联网时代...
-        """).strip()
-        info_text.setText(info_content)
+    def widget(self):
+        if self.content is None:
+            self.content = self.factory()
+            self.layout().addWidget(self.content)
+        return self.content
 
-        layout.addWidget(info_text)
-        self.setLayout(layout)
+    def showEvent(self, event):
+        self.widget()
+        super().showEvent(event)
 
 
 class ComparisonWidget(QWidget):
@@ -408,37 +97,62 @@ class ComparisonWidget(QWidget):
 
     def show_diff(self, text1, text2):
         """显示文本差异"""
-        differ = difflib.Differ()
-        diff = list(differ.compare(text1.splitlines(), text2.splitlines()))
+        from text_diff import diff_text
+        self.show_pieces(diff_text(text1, text2))
 
-        self.diff_text.clear()
-        cursor = self.diff_text.textCursor()
+    def show_pieces(self, pieces):
+        """一次性渲染已计算好的差异片段，红色背景为删除，绿色背景为新增"""
+        from text_diff import diff_html
+        self.diff_text.setHtml(diff_html(pieces, removed_color='#ffc8c8', added_color='#c8ffc8'))
 
-        # 设置格式
-        normal_format = QTextCharFormat()
-        normal_format.setBackground(Qt.white)
 
-        removed_format = QTextCharFormat()
-        removed_format.setBackground(QColor(255, 200, 200))  # 浅红色
+class MetricsWidget(QWidget):
+    """运行统计页：实时显示本次降重的统计摘要和日志，可导出 JSON 报告"""
 
-        added_format = QTextCharFormat()
-        added_format.setBackground(QColor(200, 255, 200))  # 浅绿色
+    def __init__(self, metrics, parent=None):
+        super().__init__(parent)
+        self.metrics = metrics
+        self.initUI()
 
-        # 设置两端对齐和首行缩进
-        block_format = QTextBlockFormat()
-        block_format.setAlignment(Qt.AlignJustify)
-        block_format.setTextIndent(24)  # 设置首行缩进为24像素（约2个汉字）
+    def initUI(self):
+        layout = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        header.addWidget(QLabel('本次降重统计:'))
+        export_button = QPushButton('导出报告')
+        export_button.clicked.connect(self.export_report)
+        header.addWidget(export_button)
+        header.addStretch()
+        layout.addLayout(header)
 
-        for line in diff:
-            cursor.movePosition(QTextCursor.End)
-            cursor.insertBlock(block_format)
+        self.summary_text = QTextEdit()
+        self.summary_text.setReadOnly(True)
+        layout.addWidget(self.summary_text, 2)
 
-            if line.startswith('- '):
-                cursor.insertText(line[2:], removed_format)
-            elif line.startswith('+ '):
-                cursor.insertText(line[2:], added_format)
-            elif line.startswith('  '):
-                cursor.insertText(line[2:], normal_format)
+        layout.addWidget(QLabel('日志:'))
+        self.log_text = QTextEdit()
+        self.log_text.setReadOnly(True)
+        layout.addWidget(self.log_text, 1)
+
+    def refresh(self):
+        if self.metrics is not None:
+            self.summary_text.setPlainText(format_summary(self.metrics.snapshot()))
+
+    def append_log(self, log):
+        self.log_text.append(log)
+
+    def export_report(self):
+        """把统计保存为 JSON 报告"""
+        if self.metrics is None:
+            QMessageBox.information(self, '提示', '统计未启用')
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '导出统计报告', '降重统计.json', 'JSON 文件 (*.json)')
+        if not path:
+            return
+        try:
+            self.metrics.save(path)
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'保存统计报告失败: {str(e)}')
 
 
 class WordCountTextEdit(QTextEdit):
@@ -447,15 +161,16 @@ class WordCountTextEdit(QTextEdit):
     def __init__(self, parent=None, counter_label=None):
         super().__init__(parent)
         self.counter_label = counter_label
-        self.textChanged.connect(self.update_word_count)
+        self.hops = None  # 所选模式的翻译跳数，为 None 时不显示预计消耗
+        self.stats = TextStats()
+        self.document().contentsChange.connect(self.on_contents_change)
 
         # 设置两端对齐和首行缩进
-        block_format = QTextBlockFormat()
-        block_format.setAlignment(Qt.AlignJustify)
-        block_format.setTextIndent(24)  # 设置首行缩进为24像素（约2个汉字）
-        cursor = self.textCursor()
-        cursor.select(QTextCursor.Document)
-        cursor.setBlockFormat(block_format)
+        self.block_format = QTextBlockFormat()
+        self.block_format.setAlignment(Qt.AlignJustify)
+        self.block_format.setTextIndent(24)  # 设置首行缩进为24像素（约2个汉字）
+        self.apply_block_format()
+        self.update_word_count()
 
         # 设置样式
         self.setStyleSheet("""
@@ -466,40 +181,211 @@ class WordCountTextEdit(QTextEdit):
             }
         """)
 
+    def on_contents_change(self, position, removed, added):
+        """只重新统计发生变化的段落
+
+        position 和 added 对应变化后的文档，由此得到受影响的新段落；段落总数的变化量
+        即被替换的旧段落比新段落多出的数目。对不上时退回全文统计。
+        """
+        document = self.document()
+        first = document.findBlock(position)
+        last = document.findBlock(min(position + added, document.characterCount() - 1))
+        if not first.isValid() or not last.isValid():
+            self.recount()
+            return
+        texts = []
+        block = first
+        while block.isValid() and block.blockNumber() <= last.blockNumber():
+            texts.append(block.text())
+            block = block.next()
+        replaced = len(texts) - (document.blockCount() - len(self.stats))
+        if replaced < 1 or first.blockNumber() + replaced > len(self.stats):
+            self.recount()
+            return
+        self.stats.splice(first.blockNumber(), replaced, texts)
+        self.update_word_count()
+
+    def recount(self):
+        """全文重新统计"""
+        texts = []
+        block = self.document().begin()
+        while block.isValid():
+            texts.append(block.text())
+            block = block.next()
+        self.stats.reset(texts)
+        self.update_word_count()
+
+    def set_hops(self, hops):
+        """设置所选模式的翻译跳数，用于估算额度消耗"""
+        self.hops = hops
+        self.update_word_count()
+
     def update_word_count(self):
         """更新字数统计"""
-        text = self.toPlainText()
-        char_count = len(text)
-        word_count = len(text.split())
-        if self.counter_label:
-            self.counter_label.setText(f'字符数：{char_count} | 词数：{word_count}')
+        if not self.counter_label:
+            return
+        stats = self.stats
+        text = f'字数：{stats.total}（汉字 {stats.cjk}）| 计费字符：{stats.billable}'
+        if self.hops is not None:
+            text += f' | 预计消耗：约 {stats.projected(self.hops)} 字符'
+        self.counter_label.setText(text)
+
+    def apply_block_format(self):
+        """对全文各段应用两端对齐和首行缩进"""
+        cursor = QTextCursor(self.document())
+        cursor.select(QTextCursor.Document)
+        cursor.setBlockFormat(self.block_format)
+
+    def setText(self, text):
+        """按纯文本设置内容并重新应用段落格式
+
+        QTextEdit.setText 会把含尖括号的文本当作富文本解析，并丢掉各段的对齐和缩进。
+        """
+        self.setPlainText(text)
+        self.apply_block_format()
 
     def insertFromMimeData(self, source):
-        """重写粘贴处理，保持格式"""
-        cursor = self.textCursor()
-        block_format = QTextBlockFormat()
-        block_format.setAlignment(Qt.AlignJustify)
-        block_format.setTextIndent(24)  # 设置首行缩进为24像素
-        cursor.setBlockFormat(block_format)
+        """重写粘贴处理，只粘贴纯文本并保持段落格式
 
+        每段原样插入为一个段落，不去掉行首缩进和空行，降重结果按同样的分段输出。
+        """
         if source.hasText():
-            text = source.text()
-            # 分段处理文本
-            paragraphs = text.split('\n')
-            for i, para in enumerate(paragraphs):
+            cursor = self.textCursor()
+            cursor.setBlockFormat(self.block_format)
+            text = source.text().replace('\r\n', '\n').replace('\r', '\n')
+            for i, para in enumerate(text.split('\n')):
                 if i > 0:  # 不是第一段时，先插入换行
-                    cursor.insertBlock(block_format)
-                cursor.insertText(para.strip())
+                    cursor.insertBlock(self.block_format)
+                cursor.insertText(para)
+            self.setTextCursor(cursor)
         else:
             super().insertFromMimeData(source)
 
 
+class ReduceWorker(QThread):
+    """在后台线程中执行降重语言链"""
+
+    progress = pyqtSignal(int, int)  # 已完成跳数, 总跳数
+    segment_finished = pyqtSignal(int, str)  # 行号, 译文行
+    succeeded = pyqtSignal(str)
+    diff_ready = pyqtSignal(object)  # 对比视图的差异片段
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, translation_api, text, languages, parent=None, keep_line=None, original=None):
+        super().__init__(parent)
+        self.translation_api = translation_api
+        self.text = text
+        self.original = original or text  # 预处理前的原文，用于对比视图
+        self.languages = languages
+        self.keep_line = keep_line  # 只改写重复句时，判定句子原样保留
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        # QThread.run 中未捕获的异常会使整个程序退出，例如两个实例同时打开缓存数据库时
+        try:
+            if self.languages is None:  # 自动模式
+                ok, result = self.translation_api.translate_auto(
+                    self.text, progress_callback=self.progress.emit, cancel_event=self.cancel_event,
+                    keep_line=self.keep_line)
+            else:
+                ok, result = self.translation_api.translate_chain(
+                    self.text, self.languages,
+                    progress_callback=self.progress.emit,
+                    segment_callback=self.segment_finished.emit,
+                    cancel_event=self.cancel_event,
+                    keep_line=self.keep_line)
+            if self.cancel_event.is_set():
+                self.cancelled.emit()
+            elif not ok:
+                self.failed.emit(result)
+            else:
+                self.succeeded.emit(result)
+                # 长文本的差异计算也放在后台线程
+                from text_diff import diff_text
+                self.diff_ready.emit(diff_text(self.original, result))
+        except Exception as e:
+            self.failed.emit(f"翻译失败: {str(e)}")
+
+    def cancel(self):
+        """请求停止，正在进行的请求结束后不再发起新请求"""
+        self.cancel_event.set()
+
+
+class DocumentWorker(QThread):
+    """在后台线程中流式处理长文档"""
+
+    progress = pyqtSignal(int, int)  # 已完成百分比, 100
+    succeeded = pyqtSignal(str)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, translation_api, languages, input_path, output_path, parent=None, keep_line=None,
+                 preprocess=None):
+        super().__init__(parent)
+        from document import DocumentReducer
+        self.reducer = DocumentReducer(translation_api, languages, input_path, output_path,
+                                       keep_line=keep_line, preprocess=preprocess)
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            ok, message = self.reducer.run(self.report_progress, self.cancel_event)
+        except Exception as e:
+            ok, message = False, f"文档处理失败: {str(e)}"
+        if self.cancel_event.is_set():
+            self.cancelled.emit()
+        elif ok:
+            self.succeeded.emit(message)
+        else:
+            self.failed.emit(message)
+
+    def report_progress(self, segments, bytes_read, total_bytes):
+        self.progress.emit(int(bytes_read / total_bytes * 100) if total_bytes else 0, 100)
+
+    def cancel(self):
+        """请求停止，已完成的分段保留在检查点中"""
+        self.cancel_event.set()
+
+
+class CorpusWorker(QThread):
+    """在后台线程中加载或建立参考文献库索引"""
+
+    progress = pyqtSignal(int, int)  # 已处理文档数, 文档总数
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, folder, parent=None):
+        super().__init__(parent)
+        self.folder = folder
+        self.cancel_event = threading.Event()
+
+    def run(self):
+        try:
+            index = CorpusIndex.open_folder(self.folder, self.progress.emit, self.cancel_event)
+        except Exception as e:
+            self.failed.emit(f"参考库加载失败: {str(e)}")
+            return
+        if index is not None:
+            self.succeeded.emit(index)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
 class ReduceSimilarityApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = QSettings('YourCompany', 'ArticleReducer')
         self.translation_api = TranslationAPI()
+        self.worker = None
+        self.finished_segments = {}
+        self.corpus_index = None
+        self.corpus_worker = None
         self.initUI()
+        corpus_folder = self.settings.value('corpus_folder', '')
+        if corpus_folder and os.path.isdir(corpus_folder):
+            self.load_corpus(corpus_folder)
 
     def initUI(self):
         self.setWindowTitle('文章降重助手')
@@ -537,6 +423,14 @@ class ReduceSimilarityApp(QMainWindow):
         api_layout.addWidget(QLabel('APPKEY:'))
         api_layout.addWidget(self.appkey_input)
 
+        # 账户版本决定并发请求的QPS上限
+        self.tier_combo = QComboBox()
+        self.tier_combo.addItems([f'{tier}（QPS={qps}）' for tier, qps in ACCOUNT_TIERS.items()])
+        self.tier_combo.setCurrentIndex(list(ACCOUNT_TIERS).index(self.translation_api.tier))
+        self.tier_combo.currentIndexChanged.connect(self.change_tier)
+        api_layout.addWidget(QLabel('账户版本:'))
+        api_layout.addWidget(self.tier_combo)
+
         test_button = QPushButton('测试连接')
         test_button.clicked.connect(self.test_api_connection)
         api_layout.addWidget(test_button)
@@ -544,7 +438,7 @@ class ReduceSimilarityApp(QMainWindow):
         # 添加按钮布局
         button_layout = QHBoxLayout()
         register_button = QPushButton('注册账号')
-        register_button.clicked.connect(lambda: webbrowser.open('https://fanyi-api.baidu.com/'))
+        register_button.clicked.connect(self.open_register_page)
         button_layout.addWidget(register_button)
         api_layout.addLayout(button_layout)
 
@@ -570,38 +464,11 @@ class ReduceSimilarityApp(QMainWindow):
         instruction_title.setStyleSheet("font-weight: bold; font-size: 14px;")
         instruction_layout.addWidget(instruction_title)
 
-        instruction_text = QTextEdit()
-        instruction_text.setReadOnly(True)
-        instruction_content = textwrap.dedent("""
-            使用步骤：
-            1. 配置API：
-               - 点击"注册账号"前往百度翻译开放平台注册
-               - 将获取的APPID和APPKEY填入上方对应输入框
-               - 点击"测试连接"确保API可用
-               - 点击"保存配置"保存API信息
-
-            2. 降重操作：
-               - 在右侧"原文输入"框中输入或粘贴文章
-               - 选择降重模式（字符限制：标准版5万字符/月）
-               - 点击"开始降重"，等待处理完成
-               - 降重完成后可查看降重率
-               - 使用"一键复制"获取降重结果
-
-            降重模式说明：
-            - 初级：中 -> 英 -> 德 -> 中
-            - 中级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 中
-            - 高级：中 -> 英 -> 德 -> 日 -> 葡萄牙 -> 意大利 -> 波兰 -> 保加利亚 -> 爱沙尼亚 -> 中
-
-            注意事项：
-            1. 首次使用需要配置API信息
-            2. 请注意API使用量限制
-            3. 建议先使用初级模式测试效果
-            4. 高级模式翻译路径更长，耗时更多
-            5. 降重率越高表示文章改动越大
-        """).strip()
-        instruction_text.setText(instruction_content)
-        instruction_text.setStyleSheet("background-color: #f5f5f5;")
-        instruction_layout.addWidget(instruction_text)
+        # 说明文字在窗口显示之后再填入
+        self.instruction_text = QTextEdit()
+        self.instruction_text.setReadOnly(True)
+        self.instruction_text.setStyleSheet("background-color: #f5f5f5;")
+        instruction_layout.addWidget(self.instruction_text)
 
         left_layout.addWidget(instruction_group)
 
@@ -618,7 +485,13 @@ class ReduceSimilarityApp(QMainWindow):
         formula_label.setStyleSheet("color: gray;")
         similarity_layout.addWidget(self.similarity_label)
         similarity_layout.addWidget(formula_label)
+        self.overlap_label = QLabel('参考库重复率: 未加载')
+        self.overlap_label.setToolTip('与参考文献库中文档连续重合的比例，连续13个相同字符必被检出')
+        similarity_layout.addWidget(self.overlap_label)
         similarity_layout.addStretch()
+        self.stats_label = QLabel('缓存命中: 0 | 未命中: 0 | 连接复用: 0/0 | 去重节省: 0 字符 | 遮蔽节省: 0 字符')
+        self.stats_label.setStyleSheet("color: gray;")
+        similarity_layout.addWidget(self.stats_label)
         right_layout.addLayout(similarity_layout)
 
         # 创建选项卡
@@ -637,7 +510,7 @@ class ReduceSimilarityApp(QMainWindow):
         input_label = QLabel('原文输入:')
         paste_button = QPushButton('一键粘贴')
         paste_button.clicked.connect(self.paste_text)
-        self.input_counter = QLabel('字符数：0 | 词数：0')
+        self.input_counter = QLabel()
         input_header.addWidget(input_label)
         input_header.addWidget(paste_button)
         input_header.addWidget(self.input_counter)
@@ -655,12 +528,46 @@ class ReduceSimilarityApp(QMainWindow):
         control_layout = QHBoxLayout()
         mode_label = QLabel('降重模式:')
         self.mode_combo = QComboBox()
-        self.mode_combo.addItems(['初级', '中级', '高级'])
+        self.mode_combo.addItems(list(MODES) + [AUTO_MODE, OFFLINE_MODE])
+        self.mode_combo.setItemData(self.mode_combo.count() - 1, '按本地同义词词典替换，不调用翻译接口', Qt.ToolTipRole)
+        self.mode_combo.currentTextChanged.connect(self.update_projected_cost)
+        self.update_projected_cost(self.mode_combo.currentText())
         self.translate_button = QPushButton('开始降重')
         self.translate_button.clicked.connect(self.reduce_similarity)
+        self.cancel_button = QPushButton('取消')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_reduce)
         control_layout.addWidget(mode_label)
         control_layout.addWidget(self.mode_combo)
         control_layout.addWidget(self.translate_button)
+        control_layout.addWidget(self.cancel_button)
+        self.synonym_check = QCheckBox('同义词预处理')
+        self.synonym_check.setToolTip('翻译前先按本地同义词词典替换一遍')
+        control_layout.addWidget(self.synonym_check)
+        self.mask_check = QCheckBox('保护引用和公式')
+        self.mask_check.setToolTip('引用编号、公式、数字、网址和 terms.txt 中的术语换成占位符后再翻译，完成后原样还原')
+        self.mask_check.setChecked(self.translation_api.masking)
+        self.mask_check.toggled.connect(self.toggle_masking)
+        control_layout.addWidget(self.mask_check)
+        self.document_button = QPushButton('文档降重')
+        self.document_button.setToolTip('逐段处理 .txt/.docx 长文档，中断后可从检查点继续')
+        self.document_button.clicked.connect(self.reduce_document)
+        control_layout.addWidget(self.document_button)
+        self.corpus_button = QPushButton('参考库')
+        self.corpus_button.setToolTip('选择存放参考文献（.txt/.docx）的目录，用于估算与已发表文献的重复率')
+        self.corpus_button.clicked.connect(self.choose_corpus)
+        control_layout.addWidget(self.corpus_button)
+        self.selective_check = QCheckBox('只改写重复句')
+        self.selective_check.setToolTip('只把与参考库重合比例达到阈值的句子送去翻译，其余句子原样保留，节省字符额度')
+        self.selective_check.setEnabled(False)
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(1, 100)
+        self.threshold_spin.setSuffix('%')
+        self.threshold_spin.setValue(int(DEFAULT_THRESHOLD * 100))
+        self.threshold_spin.setEnabled(False)
+        self.selective_check.toggled.connect(self.threshold_spin.setEnabled)
+        control_layout.addWidget(self.selective_check)
+        control_layout.addWidget(self.threshold_spin)
         control_layout.addStretch()
         edit_layout.addLayout(control_layout)
 
@@ -678,7 +585,7 @@ class ReduceSimilarityApp(QMainWindow):
         output_label = QLabel('降重结果:')
         copy_button = QPushButton('一键复制')
         copy_button.clicked.connect(self.copy_text)
-        self.output_counter = QLabel('字符数：0 | 词数：0')
+        self.output_counter = QLabel()
         output_header.addWidget(output_label)
         output_header.addWidget(copy_button)
         output_header.addWidget(self.output_counter)
@@ -696,13 +603,38 @@ class ReduceSimilarityApp(QMainWindow):
         # 添加编辑页面到选项卡
         tab_widget.addTab(edit_widget, "编辑")
 
-        # 对比页面
-        self.comparison_widget = ComparisonWidget()
-        tab_widget.addTab(self.comparison_widget, "对比")
+        # 对比页面和统计页面第一次切换到或用到时才构建
+        self.comparison_tab = LazyTab(ComparisonWidget)
+        tab_widget.addTab(self.comparison_tab, "对比")
+        self.metrics_tab = LazyTab(lambda: MetricsWidget(self.translation_api.metrics))
+        tab_widget.addTab(self.metrics_tab, "统计")
 
         right_layout.addWidget(tab_widget)
         main_layout.addWidget(right_panel, 2)  # 右侧面板占比2
 
+        QTimer.singleShot(0, self.load_instructions)
+
+    @property
+    def comparison_widget(self):
+        return self.comparison_tab.widget()
+
+    @property
+    def metrics_widget(self):
+        return self.metrics_tab.widget()
+
+    def load_instructions(self):
+        """填入左侧的使用说明"""
+        self.instruction_text.setPlainText(INSTRUCTIONS)
+
+    def open_register_page(self):
+        """打开百度翻译开放平台"""
+        import webbrowser  # 延迟导入，只在点击"注册账号"时加载
+        webbrowser.open(REGISTER_URL)
+
+    def update_projected_cost(self, mode):
+        """按所选模式的翻译跳数更新原文的预计额度消耗"""
+        self.input_text.set_hops(mode_hops(mode))
+
     def test_api_connection(self):
         """测试API连接"""
         appid = self.appid_input.text().strip()
@@ -732,10 +664,10 @@ class ReduceSimilarityApp(QMainWindow):
         try:
             # 使用特定的测试文本进行验证
             test_text = "API验证测试"
-            result = self.translation_api.translate(test_text, 'zh', 'en')
+            ok, result = self.translation_api.translate(test_text, 'zh', 'en', use_cache=False)
             
-            # 检查返回结果是否包含错误信息
-            if isinstance(result, str) and ('错误' in result or '失败' in result):
+            # 检查是否返回了错误信息
+            if not ok:
                 error_msg = result.split(': ')[-1] if ': ' in result else result
                 QMessageBox.warning(self, '验证失败', f'API验证失败：{error_msg}\n请检查APPID和APPKEY是否正确')
                 return
@@ -751,6 +683,13 @@ class ReduceSimilarityApp(QMainWindow):
             QMessageBox.warning(self, '错误', f'API验证失败：{str(e)}\n请检查网络连接和API配置')
             return
 
+    def change_tier(self, index):
+        """切换账户版本并保存"""
+        tier = list(ACCOUNT_TIERS)[index]
+        self.translation_api.set_tier(tier)
+        config = self.translation_api.config_manager.get_config()
+        self.translation_api.config_manager.save_config(config.get('appid', ''), config.get('appkey', ''), tier)
+
     def paste_text(self):
         """粘贴剪贴板内容到输入框"""
         clipboard = QApplication.clipboard()
@@ -764,15 +703,11 @@ class ReduceSimilarityApp(QMainWindow):
 
     def calculate_similarity(self, original, translated):
         """计算降重率（编辑距离/原文长度）"""
-        if not original or not translated:
-            return 0.0
-        edit_distance = levenshtein_distance(original, translated)
-        similarity = (edit_distance / len(original)) * 100
-        return min(similarity, 100.0)
+        return similarity_rate(original, translated)
 
     def reduce_similarity(self):
-        text = self.input_text.toPlainText().strip()
-        if not text:
+        text = self.input_text.toPlainText().rstrip()  # 保留首段的行首缩进
+        if not text.strip():
             self.output_text.setText('请输入需要降重的文章！')
             self.output_text.update()
             self.output_text.repaint()
@@ -785,54 +720,239 @@ class ReduceSimilarityApp(QMainWindow):
             QMessageBox.warning(self, "警告", error_msg)
             return
 
-        mode = self.mode_combo.currentText()
-        if mode == '初级':
-            languages = ['zh', 'en', 'de', 'zh']
-        elif mode == '中级':
-            languages = ['zh', 'en', 'de', 'jp', 'pt', 'zh']
-        else:  # 高级
-            languages = ['zh', 'en', 'de', 'jp', 'pt', 'it', 'pl', 'bul', 'est', 'zh']
+        if self.mode_combo.currentText() == OFFLINE_MODE:
+            self.reduce_offline(text)
+            return
+
+        languages = MODES.get(self.mode_combo.currentText())  # 自动模式为 None
+        source = self.rewrite_synonyms(text) if self.synonym_check.isChecked() else text
 
+        self.reset_metrics()
         self.translate_button.setEnabled(False)  # 禁用按钮
+        self.cancel_button.setEnabled(True)
         self.output_text.clear()  # 清空输出框
+        self.progress_bar.setValue(0)
         self.similarity_label.setText('降重率: 计算中...')
-        total_steps = len(languages) - 1
-        current_text = text
-
-        for i in range(total_steps):
-            from_lang = languages[i]
-            to_lang = languages[i + 1]
-            result = self.translation_api.translate(current_text, from_lang, to_lang)
-            if '错误' in result or '失败' in result:
-                self.output_text.setText(f"翻译失败（{from_lang} -> {to_lang}）: {result}")
-                self.translate_button.setEnabled(True)
-                self.progress_bar.setValue(0)
-                self.similarity_label.setText('降重率: 未计算')
-                self.output_text.update()
-                self.output_text.repaint()
-                return
-            current_text = result
-            # 更新进度条
-            self.progress_bar.setValue(int((i + 1) / total_steps * 100))
-            QApplication.processEvents()
-
-        self.output_text.setText(current_text)
-        self.output_text.update()
-        self.output_text.repaint()
+        self.finished_segments = {}
+
+        self.worker = ReduceWorker(self.translation_api, source, languages, self, self.selective_keep_line(), text)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.segment_finished.connect(self.show_partial_result)
+        self.worker.succeeded.connect(lambda result: self.on_reduce_succeeded(text, result))
+        self.worker.diff_ready.connect(self.comparison_widget.show_pieces)
+        self.worker.failed.connect(self.on_reduce_failed)
+        self.worker.cancelled.connect(self.on_reduce_cancelled)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def toggle_masking(self, checked):
+        self.translation_api.masking = checked
+
+    def rewrite_synonyms(self, text):
+        return self.synonym_rewrite(text)[0]
+
+    def synonym_rewrite(self, text):
+        """同义词替换，启用保护时跳过引用、公式和术语"""
+        protected = protected_spans(text) if self.translation_api.masking else ()
+        return default_engine().rewrite(text, protected)
+
+    def reduce_offline(self, text):
+        """离线同义词替换，文本长度有限且扫描是线性的，直接在界面线程中完成"""
+        try:
+            result, count = self.synonym_rewrite(text)
+        except OSError as e:
+            QMessageBox.warning(self, '错误', f'同义词词典加载失败: {str(e)}')
+            return
+        self.progress_bar.setValue(100)
+        self.output_text.setText(result)
+        similarity = self.calculate_similarity(text, result)
+        self.similarity_label.setText(f'降重率: {similarity:.1f}%（替换 {count} 处）')
+        self.update_overlap_label(text, result)
+        self.comparison_widget.show_diff(text, result)
+
+    def reduce_document(self):
+        """选择长文档并在后台流式降重"""
+        if self.mode_combo.currentText() not in MODES:
+            QMessageBox.warning(self, '提示', '文档降重请选择固定的降重模式')
+            return
+        input_path, _ = QFileDialog.getOpenFileName(self, '选择文档', '', '文档 (*.txt *.docx)')
+        if not input_path:
+            return
+        default_output = os.path.splitext(input_path)[0] + '_降重.txt'
+        output_path, _ = QFileDialog.getSaveFileName(self, '保存降重结果', default_output, '文本文件 (*.txt)')
+        if not output_path:
+            return
+        if os.path.exists(output_path + '.checkpoint'):
+            QMessageBox.information(self, '提示', '检测到未完成的检查点，将从上次中断处继续')
+
+        self.reset_metrics()
+        self.translate_button.setEnabled(False)
+        self.document_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+
+        languages = MODES[self.mode_combo.currentText()]
+        preprocess = self.rewrite_synonyms if self.synonym_check.isChecked() else None
+        self.worker = DocumentWorker(self.translation_api, languages, input_path, output_path, self,
+                                     self.selective_keep_line(), preprocess)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.succeeded.connect(lambda message: QMessageBox.information(self, '完成', message))
+        self.worker.failed.connect(lambda message: QMessageBox.warning(self, '中断', message))
+        self.worker.cancelled.connect(lambda: self.progress_bar.setValue(0))
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.start()
+
+    def update_progress(self, completed, total):
+        """更新进度条"""
+        self.progress_bar.setValue(int(completed / total * 100))
+        self.update_stats_label()
+
+    def show_partial_result(self, index, translated):
+        """按顺序输出已完成的连续行"""
+        self.finished_segments[index] = translated
+        parts = []
+        while len(parts) in self.finished_segments:
+            parts.append(self.finished_segments[len(parts)])
+        if parts:
+            self.output_text.setText(''.join(parts))
+
+    def on_reduce_succeeded(self, text, result):
+        self.output_text.setText(result)
         # 计算并显示降重率
-        similarity = self.calculate_similarity(text, current_text)
-        self.similarity_label.setText(f'降重率: {similarity:.1f}%')
+        similarity = self.calculate_similarity(text, result)
+        self.update_overlap_label(text, result)
+        if self.translation_api.last_kept_chars:
+            self.overlap_label.setText(self.overlap_label.text() +
+                                       f'（原样保留节省 {self.translation_api.last_kept_chars} 字符）')
+        if self.mode_combo.currentText() == AUTO_MODE and self.translation_api.last_auto_scores:
+            chain = self.translation_api.last_auto_scores[0][0]
+            self.similarity_label.setText(f'降重率: {similarity:.1f}%（{"→".join(chain)}）')
+        else:
+            self.similarity_label.setText(f'降重率: {similarity:.1f}%')
+        if self.translation_api.last_resumed_steps:
+            self.similarity_label.setText(self.similarity_label.text() +
+                                          f'（续接上次 {self.translation_api.last_resumed_steps} 步）')
+        if self.translation_api.last_mask_fallbacks:
+            self.similarity_label.setText(self.similarity_label.text() +
+                                          f'（{self.translation_api.last_mask_fallbacks} 句占位符丢失，保留原句）')
+        self.append_log(f'{self.mode_combo.currentText()}完成，{self.similarity_label.text()}')
+
+    def on_reduce_failed(self, error):
+        self.append_log(error)
+        # 只有翻译过程中某一跳失败时日志里才有已完成的部分，凭证未配置等启动前的错误不提示续传
+        if self.translation_api.journal is not None and error.startswith('翻译失败（'):
+            error += '\n\n已完成的翻译已记录，修正问题后再次点击"开始降重"只翻译剩余部分'
+        self.output_text.setText(error)
+        self.progress_bar.setValue(0)
+        self.similarity_label.setText('降重率: 未计算')
+
+    def on_reduce_cancelled(self):
+        self.append_log('已取消')
+        self.progress_bar.setValue(0)
+        self.similarity_label.setText('降重率: 已取消')
+
+    def on_worker_finished(self):
         self.translate_button.setEnabled(True)
+        self.document_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.setText('取消')
+        self.update_stats_label()
+        self.worker = None
+
+    def cancel_reduce(self):
+        """取消正在进行的降重"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.cancel_button.setText('正在取消...')
+
+    def closeEvent(self, event):
+        """关闭窗口时停止后台任务"""
+        for worker in (self.worker, self.corpus_worker):
+            if worker is not None:
+                worker.cancel()
+                worker.wait()
+        super().closeEvent(event)
+
+    def choose_corpus(self):
+        """选择参考文献目录"""
+        folder = QFileDialog.getExistingDirectory(self, '选择参考文献目录', self.settings.value('corpus_folder', ''))
+        if folder:
+            self.settings.setValue('corpus_folder', folder)
+            self.load_corpus(folder)
+
+    def load_corpus(self, folder):
+        """在后台加载参考库索引，目录中已有最新索引时直接读取"""
+        if self.corpus_worker is not None:
+            return
+        self.corpus_button.setEnabled(False)
+        self.overlap_label.setText('参考库重复率: 正在建立索引...')
+        self.corpus_worker = CorpusWorker(folder, self)
+        self.corpus_worker.progress.connect(
+            lambda done, total: self.overlap_label.setText(f'参考库重复率: 正在建立索引 {done}/{total}'))
+        self.corpus_worker.succeeded.connect(self.on_corpus_loaded)
+        self.corpus_worker.failed.connect(self.on_corpus_failed)
+        self.corpus_worker.finished.connect(self.on_corpus_worker_finished)
+        self.corpus_worker.finished.connect(self.corpus_worker.deleteLater)
+        self.corpus_worker.start()
+
+    def selective_keep_line(self):
+        """勾选只改写重复句且参考库已加载时，返回判定句子原样保留的函数"""
+        if self.corpus_index is None or not self.selective_check.isChecked():
+            return None
+        return self.corpus_index.keep_original(self.threshold_spin.value() / 100)
+
+    def on_corpus_loaded(self, index):
+        self.corpus_index = index
+        self.selective_check.setEnabled(True)
+        self.overlap_label.setText(f'参考库重复率: 已加载 {len(index.documents)} 篇')
+        text = self.input_text.toPlainText().strip()
+        if text:
+            self.update_overlap_label(text, self.output_text.toPlainText().strip())
+
+    def on_corpus_failed(self, message):
+        self.overlap_label.setText('参考库重复率: 加载失败')
+        QMessageBox.warning(self, '参考库', message)
 
-        # 更新对比视图
-        self.comparison_widget.show_diff(text, current_text)
+    def on_corpus_worker_finished(self):
+        self.corpus_button.setEnabled(True)
+        self.corpus_worker = None
+
+    def update_overlap_label(self, original, result=''):
+        """显示原文和降重结果与参考库的重复率"""
+        if self.corpus_index is None:
+            return
+        message = f'参考库重复率: 原文 {self.corpus_index.overlap_rate(original):.1f}%'
+        if result:
+            message += f' → 结果 {self.corpus_index.overlap_rate(result):.1f}%'
+        self.overlap_label.setText(message)
+
+    def reset_metrics(self):
+        """每次降重开始时重新统计"""
+        if self.translation_api.metrics is not None:
+            self.translation_api.metrics.reset()
+        self.metrics_widget.refresh()
+
+    def update_stats_label(self):
+        """显示翻译缓存命中和连接复用统计，并刷新统计页"""
+        self.metrics_widget.refresh()
+        cache = self.translation_api.cache
+        pool = self.translation_api.session.stats()
+        self.stats_label.setText(f'缓存命中: {cache.hits} | 未命中: {cache.misses} | '
+                                 f'连接复用: {pool["reused"]}/{pool["requests"]} | '
+                                 f'去重节省: {self.translation_api.dedup_saved_chars} 字符 | '
+                                 f'遮蔽节省: {self.translation_api.masked_saved_chars} 字符')
+        credentials = self.translation_api.credentials
+        if len(credentials) > 1:
+            active = sum(1 for item in credentials.summary() if not item['disabled'])
+            self.stats_label.setText(self.stats_label.text() +
+                                     f' | 凭证: {active}/{len(credentials)} 组，本月 {credentials.total_used()} 字符')
 
     def append_log(self, log):
-        """处理日志信息（现在只更新使用量）"""
-        if '段落长度' in log:
-            chars = int(log.split(': ')[1])
-            self.usage_label.setText(f'本月已使用：{self.translation_api.char_count} 字符')
-            self.usage_label.update()
+        """在统计页追加一条带时间的日志"""
+        self.metrics_widget.append_log(f'[{QTime.currentTime().toString("HH:mm:ss")}] {log}')
 
 
 if __name__ == '__main__':
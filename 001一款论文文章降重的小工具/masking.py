@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""翻译前遮蔽引用、公式、数字、网址和专业术语
+
+受保护的片段换成 {0}、{1} 这样的短占位符后再送去翻译，最后一跳完成后换回原文，
+既避免被各语言来回翻译改坏，也不必在每一跳都为这些字符消耗额度。
+相同的片段共用同一个占位符，原文片段只保存在本地的遮蔽表中，不会发送给接口。
+"""
+import os
+import re
+from functools import lru_cache
+
+DEFAULT_TERMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'terms.txt')
+PLACEHOLDER = '{{{}}}'
+# 译文中的占位符可能被改成全角括号或在括号内加空格
+PLACEHOLDER_PATTERN = re.compile(r'[{｛]\s*(\d+)\s*[}｝]')
+
+# 按优先级排列，靠前的先匹配
+PATTERNS = [
+    r'[{｛]\s*\d+\s*[}｝]',  # 原文中本来就像占位符的片段也要遮蔽，以免还原时混淆
+    r'(?:https?://|www\.)[^\s，。；、！？）)\]】]+',  # 网址
+    r'[A-Za-z0-9_.+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+',  # 邮箱
+    r'\$\$.+?\$\$|\$[^$\n]+\$|\\\(.+?\\\)|\\\[.+?\\\]',  # LaTeX 公式
+    r'[\[［]\d+(?:\s*[-–~～,，、]\s*\d+)*[\]］]',  # 引用编号，如 [12]、[3-5]、[1,2]
+    r'(?<![A-Za-z0-9_.])\d+(?:[.,:]\d+)*%?(?![A-Za-z0-9_])',  # 数字，见 MIN_NUMBER_LENGTH
+]
+MIN_NUMBER_LENGTH = 3  # 更短的数字换成占位符反而更长
+
+
+def load_terms(path=DEFAULT_TERMS):
+    """读取术语表：每行一个术语，以 # 开头的行为注释；文件不存在时返回空列表"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+@lru_cache(maxsize=8)
+def build_pattern(terms):
+    """术语按长度从长到短排在最前，其余规则依次在后"""
+    alternatives = [re.escape(term) for term in sorted(terms, key=len, reverse=True)]
+    alternatives.extend(PATTERNS)
+    return re.compile('|'.join(f'(?:{item})' for item in alternatives))
+
+
+class Masker:
+    """一次翻译任务的遮蔽表
+
+    spans[i] 为占位符 {i} 对应的原文片段，同一片段在整篇文本中只分配一个占位符。
+    """
+
+    def __init__(self, terms=()):
+        self.pattern = build_pattern(tuple(terms))
+        self.spans = []
+        self.index = {}
+
+    def protected_spans(self, text):
+        """返回需要保护的 (起始位置, 结束位置) 列表"""
+        return [match.span() for match in self.pattern.finditer(text) if self._protect(match.group())]
+
+    @staticmethod
+    def _protect(span):
+        return not span.isdigit() or len(span) >= MIN_NUMBER_LENGTH
+
+    def placeholder(self, span):
+        number = self.index.get(span)
+        if number is None:
+            number = self.index[span] = len(self.spans)
+            self.spans.append(span)
+        return PLACEHOLDER.format(number)
+
+    def mask(self, text):
+        """把受保护的片段换成占位符"""
+        return self.pattern.sub(lambda m: self.placeholder(m.group()) if self._protect(m.group()) else m.group(),
+                                text)
+
+    def is_masked_only(self, masked):
+        """遮蔽后的文本中除占位符外没有文字或数字"""
+        return not any(c.isalnum() for c in PLACEHOLDER_PATTERN.sub('', masked))
+
+    def restore(self, masked, translated):
+        """把译文中的占位符换回原文片段
+
+        masked 中的占位符在译文中缺失、重复或出现了未知序号时返回 None，由调用方保留原文。
+        """
+        expected = sorted(PLACEHOLDER_PATTERN.findall(masked))
+        found = sorted(PLACEHOLDER_PATTERN.findall(translated))
+        if expected != found:
+            return None
+        return PLACEHOLDER_PATTERN.sub(lambda m: self.spans[int(m.group(1))], translated)
+
+
+_default_terms = None
+
+
+def default_terms():
+    """加载随程序附带的术语表，只加载一次"""
+    global _default_terms
+    if _default_terms is None:
+        _default_terms = tuple(load_terms())
+    return _default_terms
+
+
+def protected_spans(text, terms=None):
+    """受保护片段的位置，供同义词替换跳过；terms 默认取随程序附带的术语表"""
+    return Masker(default_terms() if terms is None else terms).protected_spans(text)
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""翻译流水线的运行统计
+
+记录每一跳和每个单元的耗时分布、HTTP 请求的耗时和收发字节数、各错误码的重试次数、
+缓存命中率以及计费字符数。每次记录只是在锁内更新几个计数器，开销远小于一次网络请求。
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+# 耗时直方图的分桶上界（秒）
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+
+class Histogram:
+    """固定分桶的耗时直方图，分位数取所在分桶的上界（不超过最大值）"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 4) if self.count else 0.0,
+            'min': round(self.min or 0.0, 4),
+            'max': round(self.max or 0.0, 4),
+            'p50': round(self.percentile(0.5), 4),
+            'p90': round(self.percentile(0.9), 4),
+            'p99': round(self.percentile(0.99), 4),
+            'buckets': {('inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in zip(BUCKETS, self.counts) if count},
+        }
+
+
+class Metrics:
+    """一次降重任务的统计，线程安全；reset 后重新计数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._start = time.perf_counter()
+            self.requests = 0
+            self.bytes_sent = 0
+            self.bytes_received = 0
+            self.chars_billed = 0
+            self.cache_hits = 0
+            self.cache_misses = 0
+            self.retries = Counter()  # 错误码或异常类型 -> 重试次数
+            self.request_latency = Histogram()
+            self.unit_latency = Histogram()
+            self.hop_latency = {}  # (源语言, 目标语言) -> Histogram
+
+    def record_request(self, bytes_sent, bytes_received, seconds):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += bytes_sent
+            self.bytes_received += bytes_received
+            self.request_latency.observe(seconds)
+
+    def record_billed(self, chars):
+        with self._lock:
+            self.chars_billed += chars
+
+    def record_retry(self, reason):
+        with self._lock:
+            self.retries[reason] += 1
+
+    def record_cache(self, hits, misses):
+        with self._lock:
+            self.cache_hits += hits
+            self.cache_misses += misses
+
+    def observe_unit(self, hops, seconds):
+        """记录一个单元走完语言链的耗时，hops 为 [(源语言, 目标语言, 秒数), ...]
+
+        各跳的耗时在单元结束时一并记录，每个单元只取一次锁。
+        """
+        with self._lock:
+            self.unit_latency.observe(seconds)
+            for from_lang, to_lang, hop_seconds in hops:
+                histogram = self.hop_latency.get((from_lang, to_lang))
+                if histogram is None:
+                    histogram = self.hop_latency[(from_lang, to_lang)] = Histogram()
+                histogram.observe(hop_seconds)
+
+    def snapshot(self):
+        """当前统计的字典形式，可直接写成 JSON"""
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started)),
+                'elapsed': round(time.perf_counter() - self._start, 3),
+                'requests': self.requests,
+                'bytes_sent': self.bytes_sent,
+                'bytes_received': self.bytes_received,
+                'chars_billed': self.chars_billed,
+                'retries': dict(self.retries),
+                'cache': {'hits': self.cache_hits, 'misses': self.cache_misses,
+                          'hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0},
+                'request_latency': self.request_latency.to_dict(),
+                'unit_latency': self.unit_latency.to_dict(),
+                'hop_latency': {f'{from_lang}->{to_lang}': histogram.to_dict()
+                                for (from_lang, to_lang), histogram in self.hop_latency.items()},
+            }
+
+    def save(self, path):
+        """把当前统计保存为 JSON 报告"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=4)
+
+
+def format_summary(snapshot):
+    """把 snapshot() 的结果整理成几行便于阅读的文字"""
+    cache = snapshot['cache']
+    request = snapshot['request_latency']
+    unit = snapshot['unit_latency']
+    lines = [
+        f"耗时 {snapshot['elapsed']:.1f}s，请求 {snapshot['requests']} 次，计费 {snapshot['chars_billed']} 字符",
+        f"发送 {snapshot['bytes_sent'] / 1024:.1f}KB，接收 {snapshot['bytes_received'] / 1024:.1f}KB，"
+        f"缓存命中率 {cache['hit_rate'] * 100:.1f}%（{cache['hits']}/{cache['hits'] + cache['misses']}）",
+        f"单次请求 p50 {request['p50'] * 1000:.0f}ms / p99 {request['p99'] * 1000:.0f}ms，"
+        f"单元全程 p50 {unit['p50']:.2f}s / 最长 {unit['max']:.2f}s",
+    ]
+    if snapshot['retries']:
+        lines.append('重试: ' + '，'.join(f'{code}×{count}' for code, count in sorted(snapshot['retries'].items())))
+    for key, hop in snapshot['hop_latency'].items():
+        lines.append(f"  {key}: {hop['count']} 次，平均 {hop['mean'] * 1000:.0f}ms，p99 {hop['p99'] * 1000:.0f}ms")
+    return '\n'.join(lines)
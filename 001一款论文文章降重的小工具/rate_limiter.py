@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""令牌桶限速器"""
+import threading
+import time
+
+
+class TokenBucket:
+    """线程安全的令牌桶，按固定速率发放令牌
+
+    令牌不足时 acquire 会预约下一个令牌并在锁外等待，
+    因此多个线程共享同一个桶时整体请求速率不会超过 rate。
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, cancel_event=None):
+        """获取一个令牌，必要时阻塞等待
+
+        传入 cancel_event 时等待可被提前打断，被打断返回 False。
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            if cancel_event is not None:
+                return not cancel_event.wait(wait)
+            time.sleep(wait)
+        return True
+
+    def delay(self):
+        """现在取令牌需要等待的秒数，不消耗令牌"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+    def set_rate(self, rate):
+        """调整发放速率"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""命令行批量降重，不导入 PyQt5
+
+    python -m reducer_cli 论文.docx --mode 中级
+    python -m reducer_cli 论文目录 --mode 初级 --output-dir 结果 --jobs 4
+
+目录中的 .txt/.docx 文件并发处理，所有文件共用同一个翻译接口对象，
+因此共享同一个令牌桶和 QPS 上限。每个文件的结果保存为 UTF-8 文本，
+中断后重新运行会从检查点继续；全部完成后输出降重率报告。
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from corpus_index import DEFAULT_THRESHOLD, CorpusIndex
+from document import DocumentReducer, DocumentSource
+from masking import protected_spans
+from metrics import format_summary
+from similarity import similarity_rate
+from synonyms import OFFLINE_MODE, default_engine
+from tokenizer import iter_segments
+from translator import ACCOUNT_TIERS, CANCELLED_MESSAGE, MODES, ConfigManager, TranslationAPI
+
+SUPPORTED_EXTENSIONS = ('.txt', '.docx')
+OUTPUT_SUFFIX = '_降重'
+
+
+def collect_inputs(paths):
+    """展开命令行给出的文件和目录，目录只取第一层的 .txt/.docx，跳过已生成的结果文件"""
+    inputs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                stem, ext = os.path.splitext(name)
+                if (os.path.isfile(full) and ext.lower() in SUPPORTED_EXTENSIONS
+                        and not stem.endswith(OUTPUT_SUFFIX)):
+                    inputs.append(full)
+        elif os.path.isfile(path):
+            inputs.append(path)
+        else:
+            print(f'跳过不存在的路径: {path}', file=sys.stderr)
+    return inputs
+
+
+def output_path_for(input_path, output_dir=None):
+    """与图形界面一致，结果默认保存在原文旁边，文件名加 _降重 后缀"""
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    directory = output_dir or os.path.dirname(input_path)
+    return os.path.join(directory, stem + OUTPUT_SUFFIX + '.txt')
+
+
+def read_document(path):
+    return ''.join(DocumentSource(path).iter_chunks())
+
+
+def rewrite_synonyms(text, protect=True):
+    """同义词替换，protect 为 True 时跳过引用、公式和术语，返回 (替换后的文本, 替换次数)"""
+    return default_engine().rewrite(text, protected_spans(text) if protect else ())
+
+
+def rewrite_file(input_path, output_path, protect=True):
+    """离线同义词替换，逐分段流式处理"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as out:
+        for segment in iter_segments(DocumentSource(input_path).iter_chunks()):
+            rewritten, replaced = rewrite_synonyms(segment, protect)
+            out.write(rewritten)
+            count += replaced
+    return True, f"同义词替换完成，共替换 {count} 处"
+
+
+def reduce_file(translation_api, languages, input_path, output_path, cancel_event=None, corpus_index=None,
+                keep_line=None, preprocess=None):
+    """降重单个文件，返回报告中的一条记录；给出参考库索引时同时记录降重前后的参考库重复率
+
+    languages 为 None 时只做离线同义词替换。
+    """
+    start = time.perf_counter()
+    try:
+        if languages is None:
+            ok, message = rewrite_file(input_path, output_path, translation_api.masking)
+        else:
+            reducer = DocumentReducer(translation_api, languages, input_path, output_path,
+                                      keep_line=keep_line, preprocess=preprocess)
+            ok, message = reducer.run(cancel_event=cancel_event)
+    except Exception as e:
+        ok, message = False, f"降重失败: {str(e)}"
+    record = {
+        'input': input_path,
+        'output': output_path,
+        'success': ok,
+        'message': message,
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+    if ok:
+        original = read_document(input_path)
+        with open(output_path, 'r', encoding='utf-8') as f:
+            result = f.read()
+        record['characters'] = len(original)
+        record['similarity'] = round(similarity_rate(original, result), 1)
+        if corpus_index is not None:
+            record['overlap_before'] = round(corpus_index.overlap_rate(original), 1)
+            record['overlap_after'] = round(corpus_index.overlap_rate(result), 1)
+    return record
+
+
+def print_report(records):
+    print(f"{'文件':<30} {'字数':>8} {'降重率':>8} {'耗时(s)':>8}  结果")
+    for record in records:
+        name = os.path.basename(record['input'])
+        if record['success']:
+            overlap = ''
+            if 'overlap_before' in record:
+                overlap = f"（参考库重复率 {record['overlap_before']:.1f}% → {record['overlap_after']:.1f}%）"
+            print(f"{name:<30} {record['characters']:>8} {record['similarity']:>7.1f}% "
+                  f"{record['seconds']:>8.1f}  完成{overlap}")
+        else:
+            print(f"{name:<30} {'-':>8} {'-':>8} {record['seconds']:>8.1f}  {record['message']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m reducer_cli', description='文章降重命令行工具')
+    parser.add_argument('paths', nargs='+', help='.txt/.docx 文件或包含这些文件的目录')
+    parser.add_argument('--mode', choices=list(MODES) + [OFFLINE_MODE], default='初级',
+                        help=f'降重模式，{OFFLINE_MODE} 只使用本地词典，不调用翻译接口')
+    parser.add_argument('--synonyms', action='store_true', help='翻译前先按本地同义词词典替换一遍')
+    parser.add_argument('--no-mask', action='store_true',
+                        help='不保护引用编号、公式、数字、网址和 terms.txt 中的术语，全部送去翻译')
+    parser.add_argument('--output-dir', help='结果保存目录，默认与原文相同')
+    parser.add_argument('--jobs', type=int, default=4, help='同时处理的文件数')
+    parser.add_argument('--tier', choices=list(ACCOUNT_TIERS), help='账户版本，默认取 config.json')
+    parser.add_argument('--appid', help='百度翻译 APPID，默认取 config.json')
+    parser.add_argument('--appkey', help='百度翻译 APPKEY，默认取 config.json')
+    parser.add_argument('--reference', help='参考文献目录，报告中增加降重前后与参考库的重复率')
+    parser.add_argument('--selective', type=float, metavar='THRESHOLD', nargs='?', const=DEFAULT_THRESHOLD,
+                        help=f'只改写与参考库重合比例不低于该值的句子（0~1，默认 {DEFAULT_THRESHOLD}），需配合 --reference')
+    parser.add_argument('--report', help='降重率报告（JSON）保存路径，默认为结果目录下的 降重报告.json')
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.paths)
+    if not inputs:
+        print('错误: 没有找到 .txt 或 .docx 文件', file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    config = ConfigManager().get_config()
+    translation_api = TranslationAPI(args.appid or config.get('appid'), args.appkey or config.get('appkey'),
+                                     args.tier)
+    is_valid, msg = translation_api.validate_credentials()
+    if not is_valid and args.mode != OFFLINE_MODE:
+        print(f'错误: {msg}', file=sys.stderr)
+        return 2
+
+    if args.selective is not None and not args.reference:
+        print('错误: --selective 需要同时指定 --reference', file=sys.stderr)
+        return 2
+    corpus_index = None
+    keep_line = None
+    if args.reference:
+        corpus_index = CorpusIndex.open_folder(args.reference)
+        print(f'参考库: {len(corpus_index.documents)} 篇文档')
+        if args.selective is not None:
+            keep_line = corpus_index.keep_original(args.selective)
+
+    languages = MODES.get(args.mode)
+    translation_api.masking = not args.no_mask
+    preprocess = (lambda text: rewrite_synonyms(text, translation_api.masking)[0]) if args.synonyms else None
+    cancel_event = threading.Event()
+    records = {}
+    print(f'共 {len(inputs)} 个文件，模式 {args.mode}，{translation_api.tier}，'
+          f'{len(translation_api.credentials)} 组凭证（QPS={translation_api.qps}）')
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {
+            executor.submit(reduce_file, translation_api, languages, path,
+                            output_path_for(path, args.output_dir), cancel_event, corpus_index, keep_line, preprocess): path
+            for path in inputs
+        }
+        try:
+            for future in as_completed(futures):
+                record = future.result()
+                records[futures[future]] = record
+                status = '完成' if record['success'] else record['message']
+                print(f"[{len(records)}/{len(inputs)}] {os.path.basename(record['input'])}: {status}",
+                      file=sys.stderr)
+        except KeyboardInterrupt:
+            cancel_event.set()  # 正在进行的文件保存检查点后停止
+            print(CANCELLED_MESSAGE, file=sys.stderr)
+            return 130
+
+    ordered = [records[path] for path in inputs]
+    print_report(ordered)
+    metrics = translation_api.metrics.snapshot()
+    print(format_summary(metrics))
+    report_path = args.report or os.path.join(args.output_dir or os.getcwd(), '降重报告.json')
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({'mode': args.mode, 'languages': languages, 'files': ordered,
+                   'credentials': translation_api.credentials.summary(), 'metrics': metrics}, f,
+                  ensure_ascii=False, indent=4)
+    print(f'报告已保存: {report_path}')
+    return 0 if all(record['success'] for record in ordered) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
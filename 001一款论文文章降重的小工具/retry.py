@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""按错误码分类的重试调度
+
+可重试的错误按带随机抖动的指数退避重试；限流错误（54003 等）除了退避，
+还会按 AIMD（加性增、乘性减）下调所有线程共享的令牌桶速率，之后随成功请求缓慢恢复。
+"""
+import random
+import threading
+import time
+from collections import Counter
+
+RETRY = 'retry'
+THROTTLE = 'throttle'
+FATAL = 'fatal'
+
+# 百度翻译错误码：52001 请求超时、52002 系统错误可重试；54003 访问频率受限、54005 长文本请求频繁属于限流
+RETRYABLE_CODES = {'52001', '52002'}
+THROTTLE_CODES = {'54003', '54005'}
+
+
+def classify_code(code):
+    """按接口错误码分类，其余错误码（签名错误、余额不足等）重试也无济于事"""
+    code = str(code)
+    if code in RETRYABLE_CODES:
+        return RETRY
+    if code in THROTTLE_CODES:
+        return THROTTLE
+    return FATAL
+
+
+def classify_exception(exc):
+    """按网络异常分类：连接失败、超时和 5xx 可重试，429 视为限流，其余 4xx 不重试"""
+    import requests
+
+    if isinstance(exc, requests.exceptions.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        if status == 429:
+            return THROTTLE
+        if status < 500:
+            return FATAL
+    return RETRY
+
+
+class RetryScheduler:
+    """重试退避与全局速率自适应
+
+    max_rate 为账户版本允许的 QPS 上限。每次限流把速率减半（一秒内只减一次，
+    以免并发线程同时收到 54003 时把速率压得过低），并记下触发限流时的速率；
+    之后每秒约增加 increase，超过上次限流速率后只以四分之一的步长试探。
+    """
+
+    def __init__(self, rate_limiter, max_rate=1, base_delay=0.5, max_delay=8.0,
+                 max_throttle_retries=10, min_rate=0.2):
+        self.rate_limiter = rate_limiter
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_throttle_retries = max_throttle_retries  # 限流重试单独计数，不占用普通重试次数
+        self.min_rate = min_rate
+        self.retry_counts = Counter()  # 错误码或异常类型 -> 重试次数
+        self._lock = threading.Lock()
+        self._last_decrease = 0.0
+        self.set_max_rate(max_rate)
+
+    def set_max_rate(self, max_rate):
+        """设置速率上限并恢复到上限"""
+        with self._lock:
+            self.max_rate = float(max_rate)
+            self.rate = self.max_rate
+            self.learned_rate = None  # 最近一次触发限流时的速率
+            self.increase = max(0.1, self.max_rate * 0.1)
+            self.rate_limiter.set_rate(self.rate)
+
+    def record_retry(self, reason):
+        with self._lock:
+            self.retry_counts[reason] += 1
+
+    def on_success(self):
+        """成功请求后加性提高速率"""
+        with self._lock:
+            if self.rate >= self.max_rate:
+                return
+            step = self.increase
+            if self.learned_rate is not None and self.rate >= self.learned_rate:
+                step /= 4
+            # 每秒约有 rate 个成功请求，单次增加 step / rate 即每秒增加约 step
+            self.rate = min(self.max_rate, self.rate + step / self.rate)
+            self.rate_limiter.set_rate(self.rate)
+
+    def on_throttle(self):
+        """收到限流响应后乘性降低全局速率"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            self.learned_rate = self.rate
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.rate_limiter.set_rate(self.rate)
+
+    def backoff(self, attempt):
+        """第 attempt 次重试前的等待时间：指数增长的上限内均匀随机（完全抖动）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def wait(self, attempt, cancel_event=None):
+        """退避等待，可被取消事件提前打断，被打断返回 False"""
+        delay = self.backoff(attempt)
+        if cancel_event is not None:
+            return not cancel_event.wait(delay)
+        time.sleep(delay)
+        return True
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""降重率计算引擎
+
+基于 Myers/Hyyrö 位并行算法计算编辑距离，用 Python 大整数充当位向量，
+每处理一个字符只需常数次整数位运算，比逐格动态规划快两个数量级以上。
+"""
+
+
+def _common_affix(s1, s2):
+    """去掉公共前缀和后缀，返回剩余的中间部分"""
+    start = 0
+    limit = min(len(s1), len(s2))
+    while start < limit and s1[start] == s2[start]:
+        start += 1
+    end1, end2 = len(s1), len(s2)
+    while end1 > start and end2 > start and s1[end1 - 1] == s2[end2 - 1]:
+        end1 -= 1
+        end2 -= 1
+    return s1[start:end1], s2[start:end2]
+
+
+def _bit_parallel_distance(pattern, text, max_distance):
+    """Hyyrö 全局编辑距离位并行算法，pattern 为较短的字符串"""
+    m = len(pattern)
+    n = len(text)
+    mask = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+
+    # 每个字符在 pattern 中出现位置的位图
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    pv = mask
+    mv = 0
+    score = m
+    for j, c in enumerate(text):
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        # 提前退出：剩余字符每个最多让距离减少 1
+        if max_distance is not None and score - (n - j - 1) > max_distance:
+            return max_distance + 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def levenshtein_distance(s1, s2, max_distance=None):
+    """计算两个字符串的编辑距离
+
+    指定 max_distance 时，一旦确定距离超过该值就提前返回 max_distance + 1。
+    """
+    s1, s2 = _common_affix(s1, s2)
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if max_distance is not None and len(s1) - len(s2) > max_distance:
+        return max_distance + 1
+    if not s2:
+        return len(s1)
+    return _bit_parallel_distance(s2, s1, max_distance)
+
+
+def approximate_distance(s1, s2, chunk_size=2000, max_distance=None):
+    """分块近似编辑距离，适用于长文档
+
+    按长度比例把两段文本切成对应的块，逐块求距离后相加。
+    拼接各块的最优对齐仍是一个合法对齐，所以结果不会小于精确值。
+    """
+    if len(s1) <= chunk_size or not s2:
+        return levenshtein_distance(s1, s2, max_distance)
+    ratio = len(s2) / len(s1)
+    total = 0
+    for start in range(0, len(s1), chunk_size):
+        end = min(start + chunk_size, len(s1))
+        chunk2 = s2[round(start * ratio):round(end * ratio)]
+        total += levenshtein_distance(s1[start:end], chunk2)
+        if max_distance is not None and total > max_distance:
+            return max_distance + 1
+    return total
+
+
+def similarity_rate(original, translated, exact_limit=20000, chunk_size=2000):
+    """计算降重率（编辑距离/原文长度 × 100%）
+
+    原文超过 exact_limit 个字符时改用分块近似模式。
+    """
+    if not original or not translated:
+        return 0.0
+    # 距离达到原文长度时降重率已封顶为 100%，无需继续计算
+    cap = len(original)
+    if len(original) > exact_limit:
+        edit_distance = approximate_distance(original, translated, chunk_size, cap)
+    else:
+        edit_distance = levenshtein_distance(original, translated, cap)
+    similarity = (edit_distance / len(original)) * 100
+    return min(similarity, 100.0)
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""离线同义词替换
+
+把同义词词典装入 Aho-Corasick 自动机，一次线性扫描找出所有词条，
+再从左到右按最长匹配、互不重叠的原则替换，不需要联网。
+既可以单独作为离线降重模式，也可以在翻译链之前做一遍低成本的预处理。
+"""
+import os
+from collections import deque
+
+OFFLINE_MODE = '同义词替换'
+DEFAULT_DICTIONARY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'synonyms.txt')
+
+
+class SynonymEngine:
+    """基于 Aho-Corasick 自动机的最长匹配替换引擎
+
+    节点 i 的 goto[i] 为转移表，fail[i] 为失配指针，
+    output[i] 指向沿失配链遇到的下一个词条结尾节点，用于在线性时间内枚举所有匹配。
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [0]
+        self.length = [0]  # 以该节点结尾的词条长度，0 表示不是词条结尾
+        self.candidates = [None]  # 词条结尾节点对应的同义词列表
+        self.built = False
+
+    def __len__(self):
+        return sum(1 for length in self.length if length)
+
+    def add(self, word, candidates):
+        """添加词条及其同义词，同一词条重复添加时合并同义词
+
+        与词条本身相同的同义词会被去掉，去掉后没有同义词的词条不加入自动机。
+        """
+        candidates = [c for c in candidates if c != word]
+        if not word or not candidates:
+            return
+        node = 0
+        for c in word:
+            nxt = self.goto[node].get(c)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][c] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(0)
+                self.length.append(0)
+                self.candidates.append(None)
+            node = nxt
+        self.length[node] = len(word)
+        existing = self.candidates[node] or []
+        self.candidates[node] = existing + [c for c in candidates if c not in existing]
+        self.built = False
+
+    def build(self):
+        """按广度优先顺序计算失配指针和输出指针"""
+        queue = deque()
+        for child in self.goto[0].values():
+            self.fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for c, child in self.goto[node].items():
+                f = self.fail[node]
+                while f and c not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(c, 0)
+                self.fail[child] = target if target != child else 0
+                fail_node = self.fail[child]
+                self.output[child] = fail_node if self.length[fail_node] else self.output[fail_node]
+                queue.append(child)
+        self.built = True
+        return self
+
+    @classmethod
+    def load(cls, path=DEFAULT_DICTIONARY):
+        """读取词典：每行“词条 同义词1 同义词2 ...”，以 # 开头的行为注释"""
+        engine = cls()
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and not parts[0].startswith('#'):
+                    engine.add(parts[0], parts[1:])
+        return engine.build()
+
+    def iter_matches(self, text):
+        """生成所有匹配 (起始位置, 结尾节点)"""
+        if not self.built:
+            self.build()
+        goto, fail, output, length = self.goto, self.fail, self.output, self.length
+        node = 0
+        for i, c in enumerate(text):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            match = node if length[node] else output[node]
+            while match:
+                yield i - length[match] + 1, match
+                match = output[match]
+
+    def rewrite(self, text, protected=()):
+        """最长匹配替换，返回 (替换后的文本, 替换次数)
+
+        同一词条多次出现时轮流使用各个同义词，避免全文千篇一律。
+        protected 为不可改动的 (起始位置, 结束位置) 列表，例如 masking 保护的术语和引用。
+        """
+        blocked = bytearray(len(text))
+        for start, end in protected:
+            blocked[start:end] = b'\x01' * (end - start)
+        longest = {}  # 起始位置 -> 从该位置开始的最长词条节点
+        for start, node in self.iter_matches(text):
+            if any(blocked[start:start + self.length[node]]):
+                continue
+            current = longest.get(start)
+            if current is None or self.length[node] > self.length[current]:
+                longest[start] = node
+
+        parts = []
+        used = {}
+        position = 0
+        count = 0
+        i = 0
+        while i < len(text):
+            node = longest.get(i)
+            if node is None:
+                i += 1
+                continue
+            options = self.candidates[node]
+            choice = options[used.get(node, 0) % len(options)]
+            used[node] = used.get(node, 0) + 1
+            parts.append(text[position:i])
+            parts.append(choice)
+            i += self.length[node]
+            position = i
+            count += 1
+        parts.append(text[position:])
+        return ''.join(parts), count
+
+
+_default_engine = None
+
+
+def default_engine():
+    """加载随程序附带的词典，只加载一次"""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SynonymEngine.load()
+    return _default_engine
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""字词级文本差异
+
+先按句对齐，再在配对的句子内部用 Myers O(ND) 算法逐字比较。
+汉字逐字成词，西文单词和数字整体成词，两级比较让长文本也能快速得到细粒度差异。
+"""
+import html
+import re
+from collections import Counter
+
+from tokenizer import iter_sentences
+
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_]+|\s+|.', re.S)
+
+SENTENCE_MAX_D = 200  # 句级比较的最大编辑数，超过后按顺序逐句配对
+TOKEN_MAX_D = 400  # 句内比较的最大编辑数，超过后整句标记为改写
+TOKEN_MAX_RATIO = 0.6  # 句内编辑数超过两句总词数的这一比例时同样视为整句改写
+
+
+def tokenize(text):
+    """汉字和标点逐字切分，西文单词、数字和连续空白各自成词"""
+    return _TOKEN_RE.findall(text)
+
+
+def myers_diff(a, b, max_d=None):
+    """Myers O(ND) 差异算法
+
+    返回 [(tag, i1, i2, j1, j2), ...]，tag 为 'equal'、'delete' 或 'insert'；
+    编辑数超过 max_d 时返回 None。
+    """
+    # 公共前缀和后缀不参与搜索
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+
+    middle = _myers(a[prefix:n - suffix], b[prefix:m - suffix], max_d)
+    if middle is None:
+        return None
+    opcodes = []
+    if prefix:
+        opcodes.append(('equal', 0, prefix, 0, prefix))
+    opcodes.extend((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix)
+                   for tag, i1, i2, j1, j2 in middle)
+    if suffix:
+        opcodes.append(('equal', n - suffix, n, m - suffix, m))
+    return opcodes
+
+
+def _myers(a, b, max_d):
+    """贪心搜索每轮编辑后各对角线能到达的最远位置，记录每轮结果供回溯"""
+    n, m = len(a), len(b)
+    if not n and not m:
+        return []
+    limit = n + m if max_d is None else min(max_d, n + m)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            ki = k + offset
+            if k == -d or (k != d and v[ki - 1] < v[ki + 1]):
+                x = v[ki + 1]
+            else:
+                x = v[ki - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[ki] = x
+            if x >= n and y >= m:
+                trace.append(v[offset - d:offset + d + 1])
+                return _backtrack(trace, n, m)
+        trace.append(v[offset - d:offset + d + 1])
+    return None
+
+
+def _backtrack(trace, n, m):
+    """根据每轮的最远到达位置回溯出编辑脚本，trace[d][k + d] 为第 d 轮对角线 k 的位置"""
+    ops = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        previous = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and previous[k - 1 + d - 1] < previous[k + 1 + d - 1]):
+            prev_k = k + 1
+            prev_x = previous[prev_k + d - 1]
+            prev_y = prev_x - prev_k
+            start_x, start_y = prev_x, prev_y + 1
+            edit = ('insert', prev_x, prev_x, prev_y, prev_y + 1)
+        else:
+            prev_k = k - 1
+            prev_x = previous[prev_k + d - 1]
+            prev_y = prev_x - prev_k
+            start_x, start_y = prev_x + 1, prev_y
+            edit = ('delete', prev_x, prev_x + 1, prev_y, prev_y)
+        if x > start_x:
+            ops.append(('equal', start_x, x, start_y, y))
+        ops.append(edit)
+        x, y = prev_x, prev_y
+    if x > 0:
+        ops.append(('equal', 0, x, 0, y))
+    ops.reverse()
+
+    # 合并相邻的同类操作
+    merged = []
+    for op in ops:
+        if merged and merged[-1][0] == op[0]:
+            tag, i1, _, j1, _ = merged[-1]
+            merged[-1] = (tag, i1, op[2], j1, op[4])
+        else:
+            merged.append(op)
+    return merged
+
+
+def _append(pieces, tag, text):
+    if not text:
+        return
+    if pieces and pieces[-1][0] == tag:
+        pieces[-1] = (tag, pieces[-1][1] + text)
+    else:
+        pieces.append((tag, text))
+
+
+def _diff_sentence(pieces, s1, s2):
+    """比较一对句子，编辑过多时整句标记为删除和新增"""
+    t1, t2 = tokenize(s1), tokenize(s2)
+    max_d = min(TOKEN_MAX_D, max(8, int((len(t1) + len(t2)) * TOKEN_MAX_RATIO)))
+    # 公共词的多重集合大小是最长公共子序列的上界，可据此提前判断编辑数必然超限
+    common = sum((Counter(t1) & Counter(t2)).values())
+    opcodes = None if len(t1) + len(t2) - 2 * common > max_d else myers_diff(t1, t2, max_d)
+    if opcodes is None:
+        _append(pieces, 'delete', s1)
+        _append(pieces, 'insert', s2)
+        return
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'insert':
+            _append(pieces, tag, ''.join(t2[j1:j2]))
+        else:
+            _append(pieces, tag, ''.join(t1[i1:i2]))
+
+
+def diff_text(text1, text2):
+    """比较两段文本，返回 [(tag, 文本片段), ...]"""
+    sentences1 = list(iter_sentences(text1))
+    sentences2 = list(iter_sentences(text2))
+    opcodes = myers_diff(sentences1, sentences2, SENTENCE_MAX_D)
+    if opcodes is None:
+        opcodes = [('delete', 0, len(sentences1), 0, 0), ('insert', 0, 0, 0, len(sentences2))]
+
+    pieces = []
+    i = 0
+    while i < len(opcodes):
+        tag, i1, i2, j1, j2 = opcodes[i]
+        if tag == 'equal':
+            _append(pieces, 'equal', ''.join(sentences1[i1:i2]))
+            i += 1
+            continue
+        # 把连续的删除和新增合并为一个改写块，块内按顺序逐句配对比较
+        deleted, inserted = [], []
+        while i < len(opcodes) and opcodes[i][0] != 'equal':
+            tag, i1, i2, j1, j2 = opcodes[i]
+            if tag == 'delete':
+                deleted.extend(sentences1[i1:i2])
+            else:
+                inserted.extend(sentences2[j1:j2])
+            i += 1
+        for kind, s1, s2 in _align_sentences(deleted, inserted):
+            if kind == 'pair':
+                _diff_sentence(pieces, s1, s2)
+            elif kind == 'delete':
+                _append(pieces, 'delete', s1)
+            else:
+                _append(pieces, 'insert', s2)
+    return pieces
+
+
+def _overlap(c1, c2):
+    """两句字符多重集合的重合度"""
+    total = sum(c1.values()) + sum(c2.values())
+    return 2 * sum((c1 & c2).values()) / total if total else 0.0
+
+
+def _align_sentences(deleted, inserted):
+    """在改写块内贪心地单调对齐句子
+
+    改写后句子常被拆分、合并或增删，简单按序号配对会整体错位。
+    每一步比较一对一、二对一、一对二配对以及跳过原句或新句，取字符重合度最高的选择。
+    """
+    counts1 = [Counter(s) for s in deleted]
+    counts2 = [Counter(s) for s in inserted]
+    i = j = 0
+    while i < len(deleted) and j < len(inserted):
+        has_old = i + 1 < len(deleted)
+        has_new = j + 1 < len(inserted)
+        options = [(_overlap(counts1[i], counts2[j]), 1, 1)]
+        if has_old:
+            options.append((_overlap(counts1[i] + counts1[i + 1], counts2[j]), 2, 1))
+            options.append((_overlap(counts1[i + 1], counts2[j]), 1, 0))
+        if has_new:
+            options.append((_overlap(counts1[i], counts2[j] + counts2[j + 1]), 1, 2))
+            options.append((_overlap(counts1[i], counts2[j + 1]), 0, 1))
+        # 分数相同时优先一对一配对
+        _, take_old, take_new = max(options, key=lambda option: option[0])
+        if take_old and take_new:
+            yield 'pair', ''.join(deleted[i:i + take_old]), ''.join(inserted[j:j + take_new])
+        elif take_new:
+            yield 'insert', None, inserted[j]
+        else:
+            yield 'delete', deleted[i], None
+        i += take_old
+        j += take_new
+    for s1 in deleted[i:]:
+        yield 'delete', s1, None
+    for s2 in inserted[j:]:
+        yield 'insert', None, s2
+
+
+def diff_html(pieces, removed_color='#ffc8c8', added_color='#c8ffc8'):
+    """把差异片段一次性渲染为 HTML，每个段落两端对齐并首行缩进"""
+    paragraph_open = '<p style="text-align: justify; text-indent: 24px; margin: 0;">'
+    styles = {
+        'equal': None,
+        'delete': f'background-color: {removed_color};',
+        'insert': f'background-color: {added_color};',
+    }
+    parts = [paragraph_open]
+    for tag, text in pieces:
+        style = styles[tag]
+        for n, line in enumerate(text.split('\n')):
+            if n:
+                parts.append('</p>' + paragraph_open)
+            if not line:
+                continue
+            escaped = html.escape(line)
+            if style:
+                parts.append(f'<span style="{style}">{escaped}</span>')
+            else:
+                parts.append(escaped)
+    parts.append('</p>')
+    return ''.join(parts)
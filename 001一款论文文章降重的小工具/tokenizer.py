@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""流式分句器
+
+逐字符线性扫描，按中西文句末标点和换行断句，并对超长句子强制截断。
+所有生成的片段按顺序拼接后与输入完全一致。
+"""
+
+SENTENCE_ENDINGS = '。！？；!?;'
+# 句末标点之后紧跟的引号、括号并入当前句
+CLOSING_MARKS = '”’」』）》】)]"\''
+# 超长句子优先在这些位置截断
+SOFT_BREAKS = '，,、：: \t'
+
+
+def iter_sentences(source, max_length=2000):
+    """逐句生成文本片段，每个片段不超过 max_length 个字符
+
+    source 可以是字符串，也可以是依次产生字符串块的可迭代对象（例如逐行读取的文件）。
+    西文句点只有后面跟空白或文本结束时才算句末，以免切开小数和缩写中间的点。
+    """
+    if isinstance(source, str):
+        source = (source,)
+
+    buf = []
+    soft = 0  # 缓冲区内最后一个软断点之后的位置，0 表示没有
+    state = 0  # 0 句中；1 已遇到句末标点；2 遇到西文句点，待定
+    for chunk in source:
+        for c in chunk:
+            if state:
+                if c in CLOSING_MARKS or c in SENTENCE_ENDINGS or c == '.':
+                    pass
+                elif c == '\n':
+                    state = 0
+                elif state == 1 or c.isspace():
+                    state = 0
+                    if buf:
+                        yield ''.join(buf)
+                        buf = []
+                        soft = 0
+                else:
+                    state = 0  # 句点后紧跟非空白字符，例如 3.14
+
+            buf.append(c)
+            if c == '\n':
+                yield ''.join(buf)
+                buf = []
+                soft = 0
+                state = 0
+                continue
+            if c in SENTENCE_ENDINGS:
+                state = 1
+            elif c == '.':
+                state = state or 2
+            elif c in SOFT_BREAKS:
+                soft = len(buf)
+
+            if len(buf) >= max_length:
+                # 软断点太靠前时直接在长度上限处截断，避免产生过短的片段
+                cut = soft if soft and soft >= max_length // 2 else len(buf)
+                yield ''.join(buf[:cut])
+                del buf[:cut]
+                soft = 0
+    if buf:
+        yield ''.join(buf)
+
+
+def iter_segments(source, max_length=2000):
+    """把连续的句子合并成不超过 max_length 个字符的分段"""
+    current = []
+    length = 0
+    for sentence in iter_sentences(source, max_length):
+        if current and length + len(sentence) > max_length:
+            yield ''.join(current)
+            current = []
+            length = 0
+        current.append(sentence)
+        length += len(sentence)
+    if current:
+        yield ''.join(current)
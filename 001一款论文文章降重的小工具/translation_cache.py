@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""基于 SQLite 的翻译结果缓存"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_FILE = 'translation_cache.db'
+
+
+class TranslationCache:
+    """按 (段落哈希, 源语言, 目标语言) 缓存译文，超出容量时淘汰最久未使用的条目
+
+    数据库使用 WAL 日志并关闭每次提交的同步刷盘，读取不写数据库：命中时只在内存中记下使用时间，
+    下一次批量写入或调用 flush 时一并写回。get_many 和 put_many 在一次加锁、一次提交中处理一批句子。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # (哈希, 源语言, 目标语言) -> 尚未写回的最近使用时间
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+        except sqlite3.Error:
+            # 无法写入磁盘时退化为内存缓存
+            self._conn = sqlite3.connect(':memory:', check_same_thread=False)
+        try:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        except sqlite3.Error:
+            pass  # 不支持 WAL 的文件系统上沿用默认的回滚日志
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS translations (
+                hash TEXT NOT NULL,
+                from_lang TEXT NOT NULL,
+                to_lang TEXT NOT NULL,
+                dst TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (hash, from_lang, to_lang)
+            )''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)')
+        self._conn.commit()
+        self._count = self._conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+
+    @staticmethod
+    def make_key(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get(self, text, from_lang, to_lang):
+        """查询缓存，未命中返回 None"""
+        return self.get_many([text], from_lang, to_lang)[0]
+
+    def get_many(self, texts, from_lang, to_lang):
+        """批量查询，返回与 texts 等长的译文列表，未命中的位置为 None"""
+        keys = [self.make_key(text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # SQLite 单条语句的参数个数有上限
+                chunk = keys[start:start + 500]
+                found.update(self._conn.execute(
+                    'SELECT hash, dst FROM translations WHERE from_lang = ? AND to_lang = ? '
+                    f'AND hash IN ({", ".join("?" * len(chunk))})', (from_lang, to_lang, *chunk)))
+            now = time.time()
+            results = []
+            for key in keys:
+                dst = found.get(key)
+                if dst is None:
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                    self._touched[(key, from_lang, to_lang)] = now
+                results.append(dst)
+        return results
+
+    def put(self, text, from_lang, to_lang, dst):
+        """写入缓存"""
+        self.put_many([(text, dst)], from_lang, to_lang)
+
+    def put_many(self, items, from_lang, to_lang):
+        """批量写入 (原文, 译文)，连同尚未写回的使用时间一次提交"""
+        with self._lock:
+            now = time.time()
+            for text, dst in items:
+                key = self.make_key(text)
+                self._touched.pop((key, from_lang, to_lang), None)
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO translations VALUES (?, ?, ?, ?, ?)',
+                    (key, from_lang, to_lang, dst, now))
+                if cursor.rowcount > 0:
+                    self._count += 1
+                else:
+                    self._conn.execute(
+                        'UPDATE translations SET dst = ?, last_used = ? '
+                        'WHERE hash = ? AND from_lang = ? AND to_lang = ?',
+                        (dst, now, key, from_lang, to_lang))
+            self._write_touched()
+            if self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def flush(self):
+        """把命中时记下的使用时间写回数据库"""
+        with self._lock:
+            if self._touched:
+                self._write_touched()
+                self._conn.commit()
+
+    def _write_touched(self):
+        self._conn.executemany(
+            'UPDATE translations SET last_used = ? WHERE hash = ? AND from_lang = ? AND to_lang = ?',
+            [(used, *key) for key, used in self._touched.items()])
+        self._touched.clear()
+
+    def _evict(self):
+        """淘汰最久未使用的条目，一次多删 10% 以减少淘汰频率"""
+        excess = self._count - int(self.max_entries * 0.9)
+        self._conn.execute(
+            'DELETE FROM translations WHERE rowid IN '
+            '(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)', (excess,))
+        self._count -= excess
+
+    def clear(self):
+        """清空缓存和命中统计"""
+        with self._lock:
+            self._conn.execute('DELETE FROM translations')
+            self._conn.commit()
+            self._touched.clear()
+            self._count = 0
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,789 @@
+# -*- coding: utf-8 -*-
+"""翻译接口与降重语言链
+
+不依赖 PyQt5，图形界面、命令行和基准测试共用；requests 和线程池在发出第一个请求时才导入。
+"""
+import json
+import os
+import queue
+import random
+import threading
+import time
+from hashlib import md5
+
+from credentials import DEFAULT_USAGE_FILE, DISABLING_CODES, Credential, CredentialPool
+from http_pool import PooledSession
+from job_journal import DEFAULT_JOURNAL_FILE, JobJournal
+from masking import Masker, default_terms
+from metrics import Metrics
+from retry import FATAL, RETRY, THROTTLE, classify_code, classify_exception
+from similarity import similarity_rate
+from tokenizer import iter_segments, iter_sentences
+from translation_cache import DEFAULT_CACHE_FILE, TranslationCache
+
+# 百度翻译各账户版本的QPS上限
+ACCOUNT_TIERS = {'标准版': 1, '高级版': 10, '尊享版': 100}
+DEFAULT_TIER = '标准版'
+CANCELLED_MESSAGE = '翻译失败: 已取消'
+
+# 各降重模式的语言链
+MODES = {
+    '初级': ['zh', 'en', 'de', 'zh'],
+    '中级': ['zh', 'en', 'de', 'jp', 'pt', 'zh'],
+    '高级': ['zh', 'en', 'de', 'jp', 'pt', 'it', 'pl', 'bul', 'est', 'zh'],
+}
+
+# 自动模式同时尝试的语言链，共同前缀在前缀树中只翻译一次
+AUTO_MODE = '自动'
+AUTO_CHAINS = [
+    ['zh', 'en', 'zh'],
+    ['zh', 'en', 'jp', 'zh'],
+    ['zh', 'en', 'de', 'zh'],
+    ['zh', 'en', 'de', 'fra', 'zh'],
+    ['zh', 'en', 'de', 'jp', 'zh'],
+    ['zh', 'en', 'de', 'jp', 'pt', 'zh'],
+    ['zh', 'en', 'de', 'jp', 'pt', 'it', 'pl', 'bul', 'est', 'zh'],
+]
+
+
+def build_chain_trie(chains):
+    """把语言链存为前缀树，节点为 {'children': {语言: 子节点}, 'ends': [在此结束的语言链序号]}"""
+    root = {'children': {}, 'ends': []}
+    for index, chain in enumerate(chains):
+        node = root
+        for lang in chain[1:]:
+            node = node['children'].setdefault(lang, {'children': {}, 'ends': []})
+        node['ends'].append(index)
+    return root
+
+
+def count_trie_hops(node):
+    """前缀树中的翻译跳数，即边数"""
+    return sum(1 + count_trie_hops(child) for child in node['children'].values())
+
+
+def mode_hops(mode):
+    """降重模式的翻译跳数：自动模式按前缀树计算，共同前缀只算一次；不调用接口的模式为 0"""
+    if mode == AUTO_MODE:
+        return count_trie_hops(build_chain_trie(AUTO_CHAINS))
+    languages = MODES.get(mode)
+    return len(languages) - 1 if languages else 0
+
+
+class ConfigManager:
+    """配置管理器"""
+
+    def __init__(self):
+        self.config_file = 'config.json'
+        self.config = self.load_config()
+
+    def load_config(self):
+        """加载配置"""
+        if os.path.exists(self.config_file):
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except:
+                return {'appid': '', 'appkey': ''}
+        return {'appid': '', 'appkey': ''}
+
+    def save_config(self, appid, appkey, tier=None):
+        """保存配置"""
+        # 保留 endpoint 等手动添加的其他配置项
+        self.config = dict(self.config, appid=appid, appkey=appkey,
+                           tier=tier or self.config.get('tier', DEFAULT_TIER))
+        try:
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.config, f, ensure_ascii=False, indent=4)
+            return True
+        except:
+            return False
+
+    def get_config(self):
+        """获取配置"""
+        return self.config
+
+
+class TranslationAPI:
+    """百度翻译接口的封装
+
+    cache_path、journal_path 和 usage_path 分别为翻译缓存、任务日志和凭证额度记录的文件位置，
+    默认位于当前目录；cache_path 为 ':memory:' 时只在内存中缓存，journal_path 或 usage_path 为 None
+    时不记录任务日志或不保存额度，基准测试等场景因此不会在工作目录留下文件。
+    """
+
+    def __init__(self, appid=None, appkey=None, tier=None, cache_path=DEFAULT_CACHE_FILE,
+                 journal_path=DEFAULT_JOURNAL_FILE, usage_path=DEFAULT_USAGE_FILE):
+        self.appid = appid
+        self.appkey = appkey
+        self.config_manager = ConfigManager()
+        # config.json 中可用 endpoint 指向本地接口替身（benchmarks/stub_server.py）离线调试
+        self.endpoint = self.config_manager.get_config().get('endpoint') or 'http://api.fanyi.baidu.com'
+        self.translate_path = '/api/trans/vip/translate'
+        self.translate_url = self.endpoint + self.translate_path
+        self.headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+        self.max_text_length = 6000  # 最大文本长度限制
+        self.segment_size = 2000  # 分段大小
+        self.pack_requests = True  # 把多句打包进同一个多行请求
+        self.max_request_bytes = 6000  # 单次请求 q 参数的字节上限
+        self.is_authenticated = False
+        self.max_workers = 8  # 并发翻译线程数
+        # 所有语言跳共享的 keep-alive 连接池，连接超时与读取超时分开设置
+        self.session = PooledSession(pool_size=self.max_workers, connect_timeout=5, read_timeout=20)
+        self.credentials = None  # 凭证池，每组凭证有独立的令牌桶和重试调度器
+        self.cache = TranslationCache(cache_path)
+        # 各单元每一跳的中间译文，失败后重试时从断点继续；None 表示不记录
+        self.journal = JobJournal(journal_path) if journal_path else None
+        self.usage_path = usage_path
+        self.last_resumed_steps = 0  # 最近一次从任务日志恢复、无需重新请求的单元×跳数
+        self.metrics = Metrics()  # 耗时分布、收发字节、重试、缓存命中和计费字符统计；None 表示不统计
+        self._stats_lock = threading.Lock()
+        self.last_dedup_saved = 0  # 最近一次去重省下的字符数
+        self.dedup_saved_chars = 0  # 累计去重省下的字符数
+        self.last_auto_scores = []  # 自动模式各语言链的 (语言链, 降重率)，按降重率从高到低
+        self.last_auto_hops = (0, 0)  # 自动模式前缀树跳数, 各链单独运行的跳数之和
+        self.last_kept_chars = 0  # 最近一次选择性改写中原样保留的字符数乘以跳数
+        self.masking = True  # 翻译前遮蔽引用、公式、数字、网址和术语表中的术语
+        self.last_masked_saved = 0  # 最近一次遮蔽省下的字符数乘以跳数
+        self.masked_saved_chars = 0  # 累计遮蔽省下的字符数
+        self.last_mask_fallbacks = 0  # 最近一次因占位符丢失而保留原文的句子数
+        self.set_tier(tier or self.config_manager.get_config().get('tier', DEFAULT_TIER))
+
+    @property
+    def rate_limiter(self):
+        """主凭证的令牌桶"""
+        return self.credentials.primary.rate_limiter
+
+    @property
+    def retry(self):
+        """主凭证的重试调度器：按错误码退避重试，收到限流响应时降低该凭证的速率"""
+        return self.credentials.primary.retry
+
+    def build_credentials(self):
+        """由当前 APPID/APPKEY 和 config.json 中的 credentials 列表组建凭证池
+
+        当前凭证排在最前，列表中每项为 {"appid", "appkey", "tier", "monthly_quota"}，
+        tier 缺省时沿用当前账户版本，monthly_quota 缺省时不限额度；重复的 APPID 只保留第一个。
+        """
+        if self.credentials is not None:
+            self.credentials.save_usage()
+        config = self.config_manager.get_config()
+        entries = [{'appid': self.appid, 'appkey': self.appkey, 'tier': self.tier,
+                    'monthly_quota': config.get('monthly_quota')}]
+        entries.extend(config.get('credentials') or [])
+        pool = []
+        seen = set()
+        for entry in entries:
+            appid = str(entry.get('appid') or '')
+            if appid in seen or (pool and not (appid and entry.get('appkey'))):
+                continue
+            seen.add(appid)
+            tier = entry.get('tier') if entry.get('tier') in ACCOUNT_TIERS else self.tier
+            pool.append(Credential(appid, entry.get('appkey'), ACCOUNT_TIERS[tier], entry.get('monthly_quota')))
+        self.credentials = CredentialPool(pool, self.usage_path)
+        self.qps = self.credentials.qps
+
+    def validate_credentials(self):
+        """验证API凭证的有效性"""
+        if not self.appid or not self.appkey:
+            return False, "API凭证未配置"
+            
+        if not self.appid.isdigit():
+            return False, "APPID格式不正确"
+            
+        if len(self.appkey) < 20:
+            return False, "APPKEY格式不正确"
+            
+        return True, "验证通过"
+
+    def make_md5(self, s, encoding='utf-8'):
+        return md5(s.encode(encoding)).hexdigest()
+
+    def check_text_length(self, text):
+        """检查文本长度是否超过限制"""
+        if len(text) > self.max_text_length:
+            return False, f"文本长度超过限制（{len(text)}/{self.max_text_length}），请删除 {len(text) - self.max_text_length} 个字符"
+        return True, ""
+
+    def split_text(self, text):
+        """将文本分割为不超过分段大小的段落，逐段生成"""
+        return iter_segments(text, self.segment_size)
+
+    def split_lines(self, text):
+        """把文本切成逐行发送的单元，每个单元都不含内部换行
+
+        打包模式下按句切分，以便把多句装进同一个请求；否则沿用 split_text 的分段。
+        """
+        pieces = self.split_sentences(text) if self.pack_requests else self.split_text(text)
+        lines = []
+        for piece in pieces:
+            lines.extend(piece.splitlines(keepends=True))
+        return lines
+
+    def split_sentences(self, text):
+        """按中西文句末标点和换行逐句生成，超长句子按分段大小截断"""
+        return iter_sentences(text, self.segment_size)
+
+    def pack_lines(self, lines):
+        """把若干行装进字节数不超过 max_request_bytes 的批次，返回下标列表的列表"""
+        batches = []
+        current = []
+        current_bytes = 0
+        for index, line in enumerate(lines):
+            size = len(line.encode('utf-8')) + 1  # 加上分隔用的换行符
+            if current and (not self.pack_requests or current_bytes + size > self.max_request_bytes):
+                batches.append(current)
+                current = []
+                current_bytes = 0
+            current.append(index)
+            current_bytes += size
+        if current:
+            batches.append(current)
+        return batches
+
+    def pack_paragraphs(self, lines, paragraphs):
+        """先按段落分组再按字节数打包，返回下标列表的列表
+
+        paragraphs[i] 为第 i 行所在段落的序号。各段落作为独立单元并发地走完语言链，
+        总耗时取决于最慢的段落而不是各段之和；段落数超过 QPS 上限时把相邻段落按字节数
+        均衡地合并为约 QPS 组，以免请求数超出速率限制后反而更慢。
+        """
+        if not lines:
+            return []
+        sizes = [len(line.encode('utf-8')) + 1 for line in lines]
+        groups = max(1, int(self.qps))
+        split_all = len(set(paragraphs)) <= groups
+        budget = sum(sizes) / groups
+
+        batches = []
+        group = []
+        group_bytes = 0
+
+        def flush():
+            for batch in self.pack_lines([lines[i] for i in group]):
+                batches.append([group[i] for i in batch])
+
+        for index in range(len(lines)):
+            if group and paragraphs[index] != paragraphs[index - 1] and (split_all or group_bytes >= budget):
+                flush()
+                group = []
+                group_bytes = 0
+            group.append(index)
+            group_bytes += sizes[index]
+        flush()
+        return batches
+
+    def translate(self, text, from_lang, to_lang, retries=3, log_callback=None, use_cache=True):
+        """单跳翻译，返回值与 translate_chain 相同"""
+        return self.translate_chain(text, [from_lang, to_lang], retries, use_cache=use_cache)
+
+    def translate_chain(self, text, languages, retries=3, progress_callback=None,
+                        segment_callback=None, cancel_event=None, use_cache=True, keep_line=None):
+        """按语言链流水线翻译，返回 (是否成功, 译文或错误信息)
+
+        每个单元独立地走完整条语言链，不在每一跳等待全部单元完成，
+        总耗时约为 (单元数 + 跳数) × 单次延迟，而不是 单元数 × 跳数 × 单次延迟。
+        重复的句子只翻译一次；单元按段落划分（见 pack_paragraphs），打包模式下一个单元是同一组段落中
+        装满一个请求的若干句，否则是 split_text 的一个分段。各行首尾的空白和换行原样保留，
+        因此译文的分段和缩进与原文一致。
+        progress_callback(已完成跳数, 总跳数) 和 segment_callback(行号, 译文行)
+        都在调用线程中执行；设置 cancel_event 后尚未完成的单元会尽快停止。
+        keep_line(行) 返回 True 的行原样保留，用于只改写与参考库重复的句子。
+        译文本身可能含有“错误”“失败”等字样，调用方应按返回的标志判断是否成功。
+        """
+        if not text:
+            return False, "错误: 输入文本为空"
+
+        # 在每次翻译前验证API凭证
+        is_valid, msg = self.validate_credentials()
+        if not is_valid:
+            return False, f"错误: {msg}"
+
+        # 检查总文本长度
+        is_valid, error_msg = self.check_text_length(text)
+        if not is_valid:
+            return False, error_msg
+
+        lines = self.split_lines(text)
+        skip = self.select_kept_lines(lines, keep_line, len(languages) - 1)
+        ok, results = self.translate_unique_lines(lines, languages, retries, progress_callback,
+                                                  segment_callback, cancel_event, use_cache, skip)
+        if not ok:
+            return False, results
+        return True, ''.join(results)
+
+    def select_kept_lines(self, lines, keep_line, hops):
+        """返回 keep_line 判定为原样保留的行号集合，省下的字符数记入 last_kept_chars"""
+        self.last_kept_chars = 0
+        if keep_line is None:
+            return set()
+        skip = set()
+        for line_index, line in enumerate(lines):
+            if line.strip() and keep_line(line):
+                skip.add(line_index)
+                self.last_kept_chars += len(line.strip()) * hops
+        return skip
+
+    def translate_auto(self, text, chains=None, retries=3, progress_callback=None,
+                       cancel_event=None, use_cache=True, keep_line=None):
+        """同时尝试多条语言链，返回 (是否成功, 降重率最高的结果或错误信息)
+
+        语言链按前缀树逐跳展开，例如 zh→en→de 只翻译一次，之后再分别走向各自的后续语言。
+        每一跳完成后立即同时开始其所有子节点，兄弟分支共用凭证池和限速并发翻译，
+        总耗时取决于前缀树的深度而不是总跳数。
+        progress_callback(已完成跳数, 前缀树总跳数)；各条链的降重率记入 last_auto_scores，
+        前缀树跳数与各链单独运行的跳数之和记入 last_auto_hops；keep_line 与 translate_chain 相同。
+        """
+        if not text:
+            return False, "错误: 输入文本为空"
+
+        is_valid, msg = self.validate_credentials()
+        if not is_valid:
+            return False, f"错误: {msg}"
+
+        is_valid, error_msg = self.check_text_length(text)
+        if not is_valid:
+            return False, error_msg
+
+        chains = chains or AUTO_CHAINS
+        source = chains[0][0]
+        if any(chain[0] != source for chain in chains):
+            return False, "错误: 各语言链的源语言必须相同"
+        trie = build_chain_trie(chains)
+        total_hops = count_trie_hops(trie)
+        self.last_auto_hops = (total_hops, sum(len(chain) - 1 for chain in chains))
+
+        outputs = [None] * len(chains)
+        completed = 0
+        original = self.split_lines(text)
+        skip = self.select_kept_lines(original, keep_line, total_hops)
+        # 整棵前缀树共用一张遮蔽表，中间各跳之间不还原
+        masker = self.make_masker()
+        masked = original
+        if masker:
+            masked = [masker.mask(line) for line in original]
+            skip |= {i for i, line in enumerate(masked) if line.strip() and masker.is_masked_only(line)}
+        self.record_masked(original, masked, total_hops)
+
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        def translate_hop(lines, from_lang, to_lang):
+            return self.translate_unique_lines(lines, [from_lang, to_lang], retries, cancel_event=cancel_event,
+                                               use_cache=use_cache, skip=skip, mask=False)
+
+        error = None
+        # 同时进行的跳数不超过叶子数，即语言链条数
+        with ThreadPoolExecutor(max_workers=len(chains)) as executor:
+            running = {}  # future -> (子节点, 目标语言)
+
+            def expand(node, lang, lines):
+                for index in node['ends']:
+                    outputs[index] = ''.join(self.unmask_lines(masker, original, masked, lines))
+                for next_lang, child in node['children'].items():
+                    running[executor.submit(translate_hop, lines, lang, next_lang)] = (child, next_lang)
+
+            expand(trie, source, masked)
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    child, lang = running.pop(future)
+                    ok, translated = future.result()
+                    if not ok:
+                        error = error or translated
+                        continue
+                    completed += 1
+                    if progress_callback:
+                        progress_callback(completed, total_hops)
+                    # 出错或取消后不再展开新的分支，只等待已开始的跳结束
+                    if error is None and not (cancel_event is not None and cancel_event.is_set()):
+                        expand(child, lang, translated)
+        if error is not None:
+            return False, error
+        if cancel_event is not None and cancel_event.is_set():
+            return False, CANCELLED_MESSAGE
+
+        scores = [similarity_rate(text, output) for output in outputs]
+        self.last_auto_scores = sorted(zip(chains, scores), key=lambda item: -item[1])
+        return True, outputs[scores.index(max(scores))]
+
+    def translate_segments(self, segments, languages, retries=3, progress_callback=None,
+                           segment_callback=None, cancel_event=None, use_cache=True, keep_line=None):
+        """翻译一组分段，返回 (是否成功, 译文列表或错误信息)
+
+        不做总长度检查，供长文档模式按窗口分批调用；segment_callback(分段序号, 译文)
+        在一个分段的所有行都完成后调用。
+        """
+        is_valid, msg = self.validate_credentials()
+        if not is_valid:
+            return False, f"错误: {msg}"
+
+        lines = []
+        starts = []
+        owners = []
+        for index, segment in enumerate(segments):
+            segment_lines = self.split_lines(segment)
+            starts.append(len(lines))
+            lines.extend(segment_lines)
+            owners.extend([index] * len(segment_lines))
+        starts.append(len(lines))
+        remaining = [starts[i + 1] - starts[i] for i in range(len(segments))]
+        finished = list(lines)
+
+        def on_line(line_index, translated):
+            finished[line_index] = translated
+            owner = owners[line_index]
+            remaining[owner] -= 1
+            if not remaining[owner] and segment_callback:
+                segment_callback(owner, ''.join(finished[starts[owner]:starts[owner + 1]]))
+
+        skip = self.select_kept_lines(lines, keep_line, len(languages) - 1)
+        ok, results = self.translate_unique_lines(lines, languages, retries, progress_callback,
+                                                  on_line, cancel_event, use_cache, skip)
+        if not ok:
+            return False, results
+        return True, [''.join(results[starts[i]:starts[i + 1]]) for i in range(len(segments))]
+
+    def make_masker(self):
+        """未启用遮蔽时返回 None"""
+        return Masker(default_terms()) if self.masking else None
+
+    def record_masked(self, lines, masked, hops):
+        """记录遮蔽省下的字符数，并清零占位符丢失的计数"""
+        self.last_mask_fallbacks = 0
+        self.last_masked_saved = sum(len(line) - len(masked_line)
+                                     for line, masked_line in zip(lines, masked)) * hops
+        self.masked_saved_chars += self.last_masked_saved
+
+    def unmask_lines(self, masker, lines, masked, translated):
+        """逐行还原占位符，占位符丢失的行保留原文"""
+        if masker is None:
+            return translated
+        results = []
+        for line, masked_line, translated_line in zip(lines, masked, translated):
+            restored = masker.restore(masked_line, translated_line)
+            if restored is None:
+                self.last_mask_fallbacks += 1
+                restored = line
+            results.append(restored)
+        return results
+
+    @staticmethod
+    def normalize_sentence(line):
+        """去重用的规范形式：去掉首尾空白并把连续空白合并为一个空格"""
+        return ' '.join(line.split())
+
+    def translate_unique_lines(self, lines, languages, retries=3, progress_callback=None,
+                               line_callback=None, cancel_event=None, use_cache=True, skip=None, mask=True):
+        """去重后按语言链翻译各行，返回 (是否成功, 译文行列表或错误信息)
+
+        规范形式相同的句子在每一跳只翻译一次，完成后再分发回所有出现的位置，
+        省下的字符数（按原文长度乘以跳数估算）记入 last_dedup_saved 和 dedup_saved_chars。
+        mask 为 True 且启用遮蔽时，受保护的片段换成占位符后再翻译，最后一跳完成后还原，
+        占位符丢失的句子保留原文。skip 中的行号原样保留，不发送翻译请求。
+        line_callback(行号, 译文行) 在调用线程中执行，空白行和保留的行在开始前即回调。
+        """
+        skip = skip or ()
+        masker = self.make_masker() if mask else None
+        masked = lines
+        if masker:
+            masked = [masker.mask(line) for line in lines]
+            # 只剩占位符和标点的行（例如单独成行的引用编号）不必翻译
+            skip = set(skip) | {i for i, line in enumerate(masked) if line.strip() and masker.is_masked_only(line)}
+        unique = []
+        slots = {}
+        positions = []  # 去重后的句子序号 -> 出现的行号列表
+        paragraphs = []  # 去重后的句子首次出现时所在的段落序号
+        paragraph = 0
+        duplicate_chars = 0
+        for line_index, line in enumerate(masked):
+            key = self.normalize_sentence(line)
+            if line_index and lines[line_index - 1].endswith('\n'):
+                paragraph += 1
+            if not key or line_index in skip:
+                continue
+            slot = slots.get(key)
+            if slot is None:
+                slots[key] = len(unique)
+                unique.append(key)
+                positions.append([line_index])
+                paragraphs.append(paragraph)
+            else:
+                positions[slot].append(line_index)
+                duplicate_chars += len(key)
+        saved = duplicate_chars * (len(languages) - 1)
+        with self._stats_lock:  # 自动模式中各分支在不同线程中同时调用
+            self.last_dedup_saved = saved
+            self.dedup_saved_chars += saved
+        if masker:
+            self.record_masked([lines[positions[slot][0]] for slot in range(len(unique))],
+                               [masked[positions[slot][0]] for slot in range(len(unique))], len(languages) - 1)
+
+        results = list(lines)
+        if line_callback:
+            for line_index, line in enumerate(lines):
+                if not line.strip() or line_index in skip:
+                    line_callback(line_index, line)
+
+        batches = self.pack_paragraphs(unique, paragraphs)
+        units = [[unique[i] for i in batch] for batch in batches]
+
+        def on_unit(unit_index, translated):
+            for slot, dst in zip(batches[unit_index], translated):
+                if masker:
+                    dst = masker.restore(unique[slot], dst)
+                    if dst is None:
+                        self.last_mask_fallbacks += 1
+                for line_index in positions[slot]:
+                    line = lines[line_index]
+                    results[line_index] = line if dst is None else self._replace_core(line, line.strip(), dst)
+                    if line_callback:
+                        line_callback(line_index, results[line_index])
+
+        ok, error = self._run_pipeline(units, languages, retries, progress_callback, on_unit,
+                                       cancel_event, use_cache)
+        if not ok:
+            return False, error
+        return True, results
+
+    def _run_pipeline(self, units, languages, retries, progress_callback, segment_callback,
+                      cancel_event, use_cache):
+        """让各单元并发地走完语言链，返回 (是否成功, 按顺序排列的译文行列表或错误信息)
+
+        segment_callback(单元序号, 译文行列表) 在调用线程中执行。
+        使用缓存时每个单元每完成一跳都写入任务日志，任务失败后再次运行只翻译缺失的单元×跳，
+        全部完成后删除该任务的记录。
+        """
+        from concurrent.futures import ThreadPoolExecutor  # 延迟导入，连带的 logging 等模块不占用界面启动时间
+
+        hops = list(zip(languages, languages[1:]))
+        total_steps = len(units) * len(hops)
+        events = queue.Queue()
+        stop_event = threading.Event()
+        job = self.journal.job_key(units, languages) if use_cache and self.journal is not None else None
+        self.last_resumed_steps = 0
+
+        workers = max(1, min(len(units), self.max_workers))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for index, unit in enumerate(units):
+                executor.submit(self._run_chain, index, unit, hops, retries, use_cache, events,
+                                stop_event, cancel_event, job)
+
+            # 在调用线程中汇总各单元的进度事件
+            results = [None] * len(units)
+            error = None
+            completed_steps = 0
+            pending = len(units)
+            while pending:
+                kind, index, value = events.get()
+                if kind == 'hop':
+                    completed_steps += 1
+                    if value == 'resumed':
+                        self.last_resumed_steps += 1
+                    if progress_callback:
+                        progress_callback(completed_steps, total_steps)
+                    continue
+                pending -= 1
+                ok, translated = value
+                if ok:
+                    results[index] = translated
+                    if segment_callback and error is None:
+                        segment_callback(index, translated)
+                elif error is None:
+                    error = translated
+                    stop_event.set()  # 其余单元在下一跳前停止
+
+        self.credentials.save_usage()
+        self.cache.flush()
+        if error is not None:
+            return False, error
+        if job is not None:
+            self.journal.discard(job)
+        return True, results
+
+    def _run_chain(self, index, lines, hops, retries, use_cache, events, stop_event, cancel_event=None,
+                   job=None):
+        """让单个单元依次走完语言链的每一跳，给出 job 时从任务日志中该单元的最后一跳继续"""
+        current = lines
+        start = 0
+        metrics = self.metrics
+        hop_times = []
+        unit_start = time.perf_counter()
+        try:
+            if job is not None:
+                resumed = self.journal.resume(job, index)
+                if resumed is not None:
+                    start, current = resumed
+                    for _ in range(start):
+                        events.put(('hop', index, 'resumed'))
+            for hop, (from_lang, to_lang) in enumerate(hops[start:], start + 1):
+                if cancel_event is not None and cancel_event.is_set():
+                    events.put(('done', index, (False, CANCELLED_MESSAGE)))
+                    return
+                if stop_event.is_set():
+                    events.put(('done', index, (False, "翻译失败: 已中止")))
+                    return
+                hop_start = time.perf_counter()
+                ok, current = self.translate_lines(current, from_lang, to_lang, retries, use_cache,
+                                                   cancel_event)
+                if metrics is not None and ok:
+                    hop_times.append((from_lang, to_lang, time.perf_counter() - hop_start))
+                if not ok:
+                    events.put(('done', index, (False, f"翻译失败（{from_lang} -> {to_lang}）: {current}")))
+                    return
+                if job is not None:
+                    self.journal.record(job, index, hop, current)
+                events.put(('hop', index, None))
+            if metrics is not None:
+                metrics.observe_unit(hop_times, time.perf_counter() - unit_start)
+            events.put(('done', index, (True, current)))
+        except Exception as e:
+            events.put(('done', index, (False, f"翻译失败: {str(e)}")))
+
+    def translate_lines(self, lines, from_lang, to_lang, retries=3, use_cache=True, cancel_event=None):
+        """逐行翻译，返回 (是否成功, 译文行列表或错误信息)
+
+        每行首尾的空白原样保留，只翻译中间内容；缓存未命中的行打包成多行请求发送，
+        接口按行返回的结果再按顺序映射回各行。
+        """
+        results = list(lines)
+        pending = []
+        hits = 0
+        indexes = [index for index, line in enumerate(lines) if line.strip()]
+        # 相同句子、相同语言对的结果直接取缓存，不同模式共享的前缀跳也因此无需重复请求
+        cached = (self.cache.get_many([lines[i].strip() for i in indexes], from_lang, to_lang) if use_cache
+                  else [None] * len(indexes))
+        for index, dst in zip(indexes, cached):
+            if dst is not None:
+                results[index] = self._replace_core(lines[index], lines[index].strip(), dst)
+                hits += 1
+            else:
+                pending.append(index)
+        if use_cache and self.metrics is not None:
+            self.metrics.record_cache(hits, len(pending))
+
+        cores = [lines[i].strip() for i in pending]
+        for batch in self.pack_lines(cores):
+            ok, translated = self._request('\n'.join(cores[i] for i in batch), from_lang, to_lang,
+                                           retries, cancel_event)
+            if not ok:
+                return False, translated
+            if len(translated) != len(batch):
+                return False, f"翻译错误: 返回 {len(translated)} 行，应为 {len(batch)} 行"
+            self.cache.put_many([(cores[i], dst) for i, dst in zip(batch, translated)], from_lang, to_lang)
+            for i, dst in zip(batch, translated):
+                index = pending[i]
+                results[index] = self._replace_core(lines[index], cores[i], dst)
+        return True, results
+
+    @staticmethod
+    def _replace_core(line, core, translated):
+        """用译文替换行中去掉首尾空白后的部分"""
+        start = line.index(core)
+        return line[:start] + translated + line[start + len(core):]
+
+    def _request(self, q, from_lang, to_lang, retries=3, cancel_event=None):
+        """发送一次翻译请求，返回 (是否成功, 按行排列的译文列表或错误信息)
+
+        每次尝试都从凭证池中选取最早可用的凭证。按错误码决定是否重试：超时和系统错误最多尝试
+        retries 次，限流错误另计次数并降低该凭证的速率；未授权、余额不足的凭证停用后换用其他凭证。
+        """
+        import requests  # 延迟导入，只用到分句、缓存等功能时不必加载
+
+        chars = len(q)
+        metrics = self.metrics
+        attempt = 0
+        throttled = 0
+        while True:
+            credential = self.credentials.acquire(chars, cancel_event)
+            if credential is None:
+                return False, "翻译失败: 所有API凭证的本月字符额度已用尽或已停用"
+            if cancel_event is not None and cancel_event.is_set():
+                self.credentials.release(credential, chars)
+                return False, CANCELLED_MESSAGE
+            salt = random.randint(32768, 65536)
+            sign = self.make_md5(credential.appid + q + str(salt) + credential.appkey)
+
+            payload = {
+                'appid': credential.appid,
+                'q': q,
+                'from': from_lang,
+                'to': to_lang,
+                'salt': salt,
+                'sign': sign,
+                'random': str(random.random())
+            }
+
+            try:
+                request_start = time.perf_counter()
+                response = self.session.post(self.translate_url, params=payload, headers=self.headers)
+                if metrics is not None:
+                    sent = len(response.request.url) + len(response.request.body or b'')
+                    metrics.record_request(sent, len(response.content), time.perf_counter() - request_start)
+                response.raise_for_status()
+                result = response.json()
+
+                # 检查API返回的错误码
+                if 'error_code' in result:
+                    reason = str(result.get('error_code'))
+                    error = f"API错误: {reason} - {result.get('error_msg', '未知错误')}"
+                    kind = classify_code(reason)
+                elif 'trans_result' in result:
+                    self.credentials.commit(credential)
+                    if metrics is not None:
+                        metrics.record_billed(chars)
+                    return True, [item['dst'] for item in result['trans_result']]
+                else:
+                    reason = 'unknown'
+                    error = f"翻译错误: {result.get('error_code', '未知错误')} - {result.get('error_msg', '无错误信息')}"
+                    kind = RETRY
+            except requests.exceptions.RequestException as e:
+                reason = type(e).__name__
+                error = f"请求失败: {str(e)}"
+                kind = classify_exception(e)
+            except ValueError as e:
+                reason = 'invalid_json'
+                error = f"翻译错误: 无法解析返回结果 - {str(e)}"
+                kind = RETRY
+
+            self.credentials.release(credential, chars)
+            if kind == FATAL:
+                if reason in DISABLING_CODES and self.credentials.disable(credential, error):
+                    continue  # 换用其他凭证，不计入重试次数
+                return False, error  # 凭证、签名、余额等错误直接返回
+            if kind == THROTTLE:
+                throttled += 1
+                if throttled > credential.retry.max_throttle_retries:
+                    return False, error
+                self._record_retry(credential, reason)
+                if self.credentials.throttle(credential):
+                    continue  # 还有未在冷却的凭证，立即换用，不必退避
+            else:
+                attempt += 1
+                if attempt >= retries:
+                    return False, error
+                self._record_retry(credential, reason)
+            if not credential.retry.wait(attempt + throttled - 1, cancel_event):
+                return False, CANCELLED_MESSAGE
+
+    def _record_retry(self, credential, reason):
+        credential.retry.record_retry(reason)
+        if self.metrics is not None:
+            self.metrics.record_retry(reason)
+
+    def set_tier(self, tier):
+        """按账户版本调整QPS上限"""
+        self.tier = tier if tier in ACCOUNT_TIERS else DEFAULT_TIER
+        self.build_credentials()
+
+    def set_api_info(self, appid, appkey):
+        """设置API信息并保存"""
+        # 验证新的API凭证
+        self.appid = appid
+        self.appkey = appkey
+        is_valid, msg = self.validate_credentials()
+        if not is_valid:
+            return False
+        self.build_credentials()
+            
+        # 保存到配置文件
+        return self.config_manager.save_config(appid, appkey, self.tier)